@@ -4,8 +4,31 @@ import adsk.core
 import adsk.fusion
 import json
 
+# Handlers that live as long as the add-in
 handlers = []
 
+# One list of handlers per running command, released when the command is destroyed
+command_scopes = []
+
+
+# Returns the number of event handlers currently kept alive by the add-in
+def handler_count():
+    return len(handlers) + sum(len(scope) for scope in command_scopes)
+
+
+# Starts a handler scope for a new command
+def open_handler_scope():
+    scope = []
+    command_scopes.append(scope)
+    return scope
+
+
+# Releases the handlers of a command that has been destroyed
+def release_handler_scope(scope):
+    if scope in command_scopes:
+        command_scopes.remove(scope)
+    scope.clear()
+
 
 # Returns a dictionary for all inputs. Very useful for creating quick Fusion 360 Add-ins
 def get_inputs(command_inputs):
@@ -354,9 +377,10 @@ class ExecutePreviewHandler(adsk.core.CommandEventHandler):
 
 
 class DestroyHandler(adsk.core.CommandEventHandler):
-    def __init__(self, cmd_object):
+    def __init__(self, cmd_object, scope=None):
         super().__init__()
         self.cmd_object_ = cmd_object
+        self.scope = scope
 
     def notify(self, args):
         app = adsk.core.Application.cast(adsk.core.Application.get())
@@ -379,6 +403,13 @@ class DestroyHandler(adsk.core.CommandEventHandler):
             if ui:
                 ui.messageBox('Input changed event failed: {}'.format(traceback.format_exc()))
 
+        finally:
+            if self.scope is not None:
+                release_handler_scope(self.scope)
+
+            if self.cmd_object_.debug and ui:
+                ui.messageBox('***Debug ***Event handlers still referenced= {}'.format(handler_count()))
+
 
 class InputChangedHandler(adsk.core.InputChangedEventHandler):
     def __init__(self, cmd_object):
@@ -441,26 +472,27 @@ class CommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         ui = app.userInterface
 
         try:
-            global handlers
-
             command_ = args.command
             inputs_ = command_.commandInputs
 
+            # These handlers are only needed while this command runs
+            scope = open_handler_scope()
+
             on_execute_handler = CommandExecuteHandler(self.cmd_object_)
             command_.execute.add(on_execute_handler)
-            handlers.append(on_execute_handler)
+            scope.append(on_execute_handler)
 
             on_input_changed_handler = InputChangedHandler(self.cmd_object_)
             command_.inputChanged.add(on_input_changed_handler)
-            handlers.append(on_input_changed_handler)
+            scope.append(on_input_changed_handler)
 
-            on_destroy_handler = DestroyHandler(self.cmd_object_)
+            on_destroy_handler = DestroyHandler(self.cmd_object_, scope)
             command_.destroy.add(on_destroy_handler)
-            handlers.append(on_destroy_handler)
+            scope.append(on_destroy_handler)
 
             on_execute_preview_handler = ExecutePreviewHandler(self.cmd_object_)
             command_.executePreview.add(on_execute_preview_handler)
-            handlers.append(on_execute_preview_handler)
+            scope.append(on_execute_preview_handler)
 
             if self.cmd_object_.debug:
                 ui.messageBox('***Debug ***Panel command created successfully')
@@ -482,14 +514,19 @@ class PaletteCommandCreatedEventHandler(adsk.core.CommandCreatedEventHandler):
         ui = app.userInterface
 
         try:
-            global handlers
-
             command_ = args.command
             inputs_ = command_.commandInputs
 
+            # These handlers are only needed while this command runs
+            scope = open_handler_scope()
+
             on_execute_handler = PaletteCommandExecuteHandler(self.cmd_object_)
             command_.execute.add(on_execute_handler)
-            handlers.append(on_execute_handler)
+            scope.append(on_execute_handler)
+
+            on_destroy_handler = DestroyHandler(self.cmd_object_, scope)
+            command_.destroy.add(on_destroy_handler)
+            scope.append(on_destroy_handler)
 
             if self.cmd_object_.debug:
                 ui.messageBox('***Debug *** Palette Panel command created successfully')
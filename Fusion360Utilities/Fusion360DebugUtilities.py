@@ -2,6 +2,8 @@ __author__ = 'rainsbp'
 
 import time
 import os
+import math
+from collections import deque
 from os.path import expanduser
 
 import adsk.core
@@ -40,13 +42,226 @@ def variable_message(variable, extra_info=''):
         ui.messageBox(message_string)
 
 
+# Latency histogram with constant memory, durations are counted in buckets that grow by about 9% each
+class Histogram:
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'buckets')
+
+    # Buckets per power of two
+    SUB_BUCKETS = 8
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = 0.0
+        self.buckets = {}
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+        # Bucket by microseconds, mantissa is in [0.5, 1)
+        mantissa, exponent = math.frexp(seconds * 1e6)
+        bucket = exponent * self.SUB_BUCKETS + int((mantissa - 0.5) * 2 * self.SUB_BUCKETS)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    # Upper bound of the bucket holding the given percentile, in seconds
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0.0
+
+        target = math.ceil(percent / 100.0 * self.count)
+        seen = 0
+
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+
+            if seen >= target:
+                exponent, sub_bucket = divmod(bucket, self.SUB_BUCKETS)
+                upper = (0.5 + (sub_bucket + 1) / (2.0 * self.SUB_BUCKETS)) * 2.0 ** exponent / 1e6
+                return min(upper, self.maximum)
+
+        return self.maximum
+
+
+# Span file that is written in blocks and rotated when it gets too big
+# Keeps backup_count older files as name.1, name.2, ...
+class RotatingFileSink:
+
+    def __init__(self, file_name, max_bytes=1000000, backup_count=3, buffer_size=1000):
+        self.file_name = file_name
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+
+        self.buffer = []
+
+    def write(self, record):
+        self.buffer.append(record)
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+
+        lines = ''.join(name + ',' + identifier + ',' + "%0.6f" % start + ',' + "%0.6f" % duration + '\n'
+                        for name, identifier, start, duration in self.buffer)
+        self.buffer = []
+
+        if os.path.exists(self.file_name) and os.path.getsize(self.file_name) + len(lines) > self.max_bytes:
+            self.rotate()
+
+        with open(self.file_name, 'a') as log_file:
+            log_file.write(lines)
+
+    def rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.file_name + '.' + str(index)
+            if os.path.exists(source):
+                os.replace(source, self.file_name + '.' + str(index + 1))
+
+        if self.backup_count > 0:
+            os.replace(self.file_name, self.file_name + '.1')
+        else:
+            os.remove(self.file_name)
+
+
+# Times the enclosed block as a span of an Instrumentation
+class Span:
+    __slots__ = ('instrumentation', 'name', 'identifier', 'start')
+
+    def __init__(self, instrumentation, name, identifier=''):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.identifier = identifier
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start, self.identifier, self.start)
+        return False
+
+
+# Collects timed spans in a ring buffer of the most recent spans and a histogram per span name
+# While disabled spans cost a single attribute check
+class Instrumentation:
+
+    def __init__(self, capacity=10000):
+        self.is_enabled = False
+        self.spans = deque(maxlen=capacity)
+        self.histograms = {}
+        self.sink = None
+
+    def enable(self, sink=None, capacity=None):
+        if capacity is not None and capacity != self.spans.maxlen:
+            self.spans = deque(self.spans, maxlen=capacity)
+
+        self.sink = sink
+        self.is_enabled = True
+
+    def disable(self):
+        self.flush()
+        self.is_enabled = False
+
+    def span(self, name, identifier=''):
+        return Span(self, name, identifier)
+
+    def record(self, name, duration, identifier='', start=None):
+        if not self.is_enabled:
+            return
+
+        if start is None:
+            start = time.perf_counter() - duration
+
+        record = (name, identifier, start, duration)
+        self.spans.append(record)
+
+        histogram = self.histograms.get(name, None)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(duration)
+
+        if self.sink is not None:
+            self.sink.write(record)
+
+    def flush(self):
+        if self.sink is not None:
+            self.sink.flush()
+
+    def reset(self):
+        self.spans.clear()
+        self.histograms.clear()
+
+    # Count, total and p50/p95/p99 of every span name, slowest total first
+    def summary(self, minimum_time=0.0):
+        message_string = ''
+
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True):
+            if histogram.total < minimum_time:
+                continue
+
+            message_string += name + ': count = ' + str(histogram.count)
+            message_string += ', total = ' + "%0.6f" % histogram.total
+            message_string += ', p50 = ' + "%0.6f" % histogram.percentile(50)
+            message_string += ', p95 = ' + "%0.6f" % histogram.percentile(95)
+            message_string += ', p99 = ' + "%0.6f" % histogram.percentile(99) + '\n'
+
+        return message_string
+
+
+# Instrumentation shared by the whole add-in, disabled until enable_instrumentation is called
+instrumentation = Instrumentation()
+
+
+# Turns on instrumentation with spans written to a rotating file next to the perf logs
+def enable_instrumentation(capacity=None, max_bytes=1000000, backup_count=3):
+    sink = RotatingFileSink(get_span_file_name(), max_bytes, backup_count)
+    instrumentation.enable(sink, capacity)
+
+
+# Decorator timing every call of a function as a span, the span name defaults to the function name
+def instrumented(name=None):
+    def decorator(function):
+        span_name = name or function.__name__
+
+        def wrapper(*args, **kwargs):
+            if not instrumentation.is_enabled:
+                return function(*args, **kwargs)
+
+            with Span(instrumentation, span_name):
+                return function(*args, **kwargs)
+
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    return decorator
+
+
 # Performance time logging function
+# Each call appends an entry to the log, with instrumentation enabled the time since the previous entry is also a span
 def perf_log(log, function_reference, command, identifier=''):
-    log.append((function_reference, command, identifier, time.process_time()))
+    now = time.process_time()
 
+    # With instrumentation enabled every entry is also kept as a span of the time since the previous entry
+    if log and instrumentation.is_enabled:
+        instrumentation.record(function_reference + ' ' + command, now - log[-1][3], identifier)
+
+    log.append((function_reference, command, identifier, now))
 
-def perf_message(log):
 
+def perf_message(log):
     minimum_perf_time = .01
     message_string = ''
 
@@ -67,6 +282,10 @@ def perf_message(log):
 
     log_file.close()
 
+    if instrumentation.is_enabled:
+        message_string += instrumentation.summary(minimum_perf_time)
+        instrumentation.flush()
+
     app = adsk.core.Application.get()
     ui = app.userInterface
 
@@ -74,6 +293,15 @@ def perf_message(log):
         ui.messageBox(message_string)
 
 
+# Writes the count, total and p50/p95/p99 of every span name recorded so far and starts counting again
+def write_instrumentation_summary(minimum_time=0.0):
+    summary_file = open(get_summary_file_name(), 'w')
+    summary_file.write(instrumentation.summary(minimum_time))
+    summary_file.close()
+
+    instrumentation.reset()
+
+
 # Creates directory and returns file name for log file
 def get_log_file_name():
 
@@ -91,3 +319,31 @@ def get_log_file_name():
     log_file_name = home + 'FusionDebugUtilities-PerfLog-' + time_stamp + '.csv'
     return log_file_name
 
+
+# Creates directory and returns file name for the span file, the same file is used by every session
+def get_span_file_name():
+
+    # Get Home directory
+    home = expanduser("~")
+    home += '/Fusion360DebugUtilities/'
+
+    # Create if doesn't exist
+    if not os.path.exists(home):
+        os.makedirs(home)
+
+    return home + 'FusionDebugUtilities-Spans.csv'
+
+
+
+# Creates directory and returns file name for the span summary
+def get_summary_file_name():
+
+    # Get Home directory
+    home = expanduser("~")
+    home += '/Fusion360DebugUtilities/'
+
+    # Create if doesn't exist
+    if not os.path.exists(home):
+        os.makedirs(home)
+
+    return home + 'FusionDebugUtilities-Summary.txt'
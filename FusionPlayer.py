@@ -1,8 +1,9 @@
 # Importing sample Fusion Command
 # Could import multiple Command definitions here
 from .Demo1Command import Demo1Command
-from .PlayerCommand import PlayerCommand, PlayFromHereCommand, PlayFromStartCommand
+from .PlayerCommand import PlayerCommand, PlayFromHereCommand, PlayFromStartCommand, ExportTimelineCommand
 from .DemoPaletteCommand import DemoPaletteShowCommand, DemoPaletteSendCommand
+from .Fusion360Utilities.Fusion360DebugUtilities import enable_instrumentation, instrumentation
 
 commands = []
 command_definitions = []
@@ -47,6 +48,19 @@ cmd = {
 }
 command_definitions.append(cmd)
 
+# Define parameters for 1st command
+cmd = {
+    'cmd_name': 'Export Timeline',
+    'cmd_description': 'Write every timeline step to a JSON lines file for offline analysis',
+    'cmd_id': 'cmdID_ExportTimelineCommand',
+    'cmd_resources': './resources',
+    'workspace': 'FusionSolidEnvironment',
+    'toolbar_panel_id': 'Player',
+    'command_promoted': False,
+    'class': ExportTimelineCommand
+}
+command_definitions.append(cmd)
+
 # # Define parameters for 2nd command
 # cmd = {
 #     'cmd_name': 'Fusion Palette Demo Command',
@@ -87,6 +101,10 @@ command_definitions.append(cmd)
 # Set to True to display various useful messages when debugging your app
 debug = False
 
+# Set to True to time the player's hot paths, spans and the p50/p95/p99 of each playback are written to
+# ~/Fusion360DebugUtilities/
+instrument = False
+
 
 # Don't change anything below here:
 for cmd_def in command_definitions:
@@ -96,6 +114,9 @@ for cmd_def in command_definitions:
 
 def run(context):
 
+    if instrument:
+        enable_instrumentation()
+
     for run_command in commands:
         run_command.on_run()
 
@@ -103,3 +124,5 @@ def run(context):
 def stop(context):
     for stop_command in commands:
         stop_command.on_stop()
+
+    instrumentation.disable()
@@ -0,0 +1,185 @@
+# Offline analysis of exported timelines
+#
+# Runs the player's step records, health index, queries and messages over the files written by Export Timeline, so
+# archived designs can be checked on machines without Fusion.  Each file is analysed on its own by a pool of worker
+# processes and yields one report: step counts by kind, component and health, and every step with an error or warning.
+#
+# Usage, from the folder that holds the add-in folder:
+#     python -m FusionPlayer.PlayerAnalysis Exports/*.ndjson --jobs 8 --output reports.ndjson --fail-on-problems
+
+import argparse
+import functools
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .PlayerTimeline import TimelineStep, HealthIndex, FEATURE
+from .PlayerMessages import render_message
+from .PlayerQuery import StepQuery, QueryIndex
+
+# Name the player gives the health state of a step without problems
+HEALTHY = "Healthy"
+
+
+def read_steps(file_name: str):
+    """
+    Reads the steps of an exported timeline
+    :param file_name: File written by Export Timeline
+    :return: The steps and the health state names the export used, by health state
+    :rtype: tuple
+    """
+    steps = []
+    names = {}
+
+    with open(file_name) as export_file:
+        for line in export_file:
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            step = TimelineStep.from_record(record)
+
+            if step.health is not None:
+                names.setdefault(step.health, record.get("health", str(step.health)))
+
+            steps.append(step)
+
+    return steps, names
+
+
+def analyze_steps(steps: list, health_state_names: dict, query: str = '', messages: bool = False) -> dict:
+    """
+    Builds the report of one timeline
+    :param steps: The steps of the timeline in order
+    :param health_state_names: Health state names by health state
+    :param query: Only report the steps matching this query, see PlayerQuery
+    :param messages: Add the message the player shows to every problem
+    :return: Counts by kind, component and health and the steps with an error or warning
+    :rtype: dict
+    """
+    step_query = StepQuery(query)
+
+    if step_query:
+        selected = set(QueryIndex(steps).select(step_query))
+        steps = [step for step in steps if step.index in selected]
+
+    healthy = next((state for state, name in health_state_names.items() if name == HEALTHY), None)
+
+    problems = HealthIndex(healthy)
+
+    for step in steps:
+        problems.update(step.index, step.health)
+
+    by_index = {step.index: step for step in steps}
+    problem_reports = []
+
+    for index in problems.indexes:
+        step = by_index[index]
+
+        problem = {
+            "index": step.index,
+            "name": step.name,
+            "type": step.kind,
+            "component": step.component,
+            "health": health_state_names.get(step.health, str(step.health)),
+            "message": step.message
+        }
+
+        if messages:
+            problem["html"] = render_message(step.to_result(), health_state_names)
+
+        problem_reports.append(problem)
+
+    return {
+        "steps": len(steps),
+        "kinds": dict(Counter(step.kind for step in steps)),
+        "components": dict(Counter(step.component for step in steps if step.component)),
+        "health": dict(Counter(health_state_names.get(step.health, str(step.health)) for step in steps
+                               if step.health is not None)),
+        "bodies": len(set(token for step in steps if step.kind == FEATURE for token in step.body_tokens)),
+        "problems": problem_reports
+    }
+
+
+def analyze_file(file_name: str, query: str = '', messages: bool = False) -> dict:
+    """
+    Reads and analyses one exported timeline, runs in a worker process
+    :param file_name: File written by Export Timeline
+    :param query: Only report the steps matching this query
+    :param messages: Add the message the player shows to every problem
+    :return: The report, with the error instead if the file could not be read
+    :rtype: dict
+    """
+    try:
+        steps, names = read_steps(file_name)
+
+    except (OSError, ValueError, KeyError) as error:
+        return {"file": file_name, "error": "{}: {}".format(type(error).__name__, error)}
+
+    report = analyze_steps(steps, names, query, messages)
+    report["file"] = file_name
+    return report
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Check timelines exported by the player without Fusion')
+    parser.add_argument('files', nargs='+', help='Files written by Export Timeline')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--query', default='', help='Only report the steps matching this query, e.g. type:feature')
+    parser.add_argument('--messages', action='store_true', help='Add the player message of every problem step')
+    parser.add_argument('--output', default=None, help='Write one JSON report per file to this file')
+    parser.add_argument('--fail-on-problems', action='store_true',
+                        help='Exit with 1 if any timeline has an error or warning')
+    options = parser.parse_args(arguments)
+
+    analyze = functools.partial(analyze_file, query=options.query, messages=options.messages)
+    chunk_size = max(1, len(options.files) // (options.jobs * 4))
+
+    totals = Counter()
+    health = Counter()
+
+    output = open(options.output, 'w') if options.output is not None else None
+
+    try:
+        with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+
+            # Reports arrive in file order and are written as they arrive
+            for report in executor.map(analyze, options.files, chunksize=chunk_size):
+
+                if output is not None:
+                    output.write(json.dumps(report, separators=(',', ':')) + '\n')
+
+                totals["files"] += 1
+
+                if "error" in report:
+                    totals["failed"] += 1
+                    print('{}: {}'.format(report["file"], report["error"]), file=sys.stderr)
+                    continue
+
+                totals["steps"] += report["steps"]
+                totals["problems"] += len(report["problems"])
+                totals["files with problems"] += 1 if report["problems"] else 0
+                health.update(report["health"])
+
+                for problem in report["problems"]:
+                    print('{}: step {} {} ({}) {}: {}'.format(report["file"], problem["index"] + 1, problem["name"],
+                                                              problem["type"], problem["health"], problem["message"]))
+
+    finally:
+        if output is not None:
+            output.close()
+
+    print('{} files, {} failed, {} steps, {} problems in {} files'.format(
+        totals["files"], totals["failed"], totals["steps"], totals["problems"], totals["files with problems"]))
+    print(', '.join('{} {}'.format(count, name) for name, count in health.most_common()))
+
+    if totals["failed"] or (options.fail_on_problems and totals["problems"]):
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# Frame scheduling for autoplay
+#
+# A worker thread keeps a fixed frame clock and asks Fusion for a frame through a callback, typically by firing a
+# custom event.  Steps are always played on Fusion's main thread, the worker only decides when to ask.
+#
+# Only one frame is ever outstanding.  A tick that comes while the previous frame is still playing is coalesced into
+# it, and ticks missed while the worker waited are dropped, so a slow step never builds up a backlog of frames.
+
+import threading
+import time
+
+
+class FrameScheduler:
+
+    def __init__(self, request_frame, rate: float):
+        """
+        :param request_frame: Called from the worker thread when a frame is due, must not touch the Fusion API
+        :param rate: Frames per second to aim for
+        """
+        self.request_frame = request_frame
+        self.interval = 1.0 / rate
+
+        self.stopped = threading.Event()
+        self.pending = threading.Event()
+        self.thread = None
+
+        # Frame counters
+        self.frames = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+        self.started_at = None
+        self.last_frame_at = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and not self.stopped.is_set()
+
+    @property
+    def achieved_rate(self) -> float:
+        """
+        Frames per second actually played since autoplay started
+        :rtype: float
+        """
+        if self.frames == 0 or self.last_frame_at == self.started_at:
+            return 0.0
+
+        return self.frames / (self.last_frame_at - self.started_at)
+
+    def start(self):
+        if self.is_running:
+            return
+
+        self.stopped.clear()
+        self.pending.clear()
+
+        self.started_at = time.perf_counter()
+        self.last_frame_at = self.started_at
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(self.interval + 1.0)
+
+        self.thread = None
+
+    def frame_done(self):
+        """
+        Called on the main thread once the requested frame has been played
+        """
+        self.frames += 1
+        self.last_frame_at = time.perf_counter()
+        self.pending.clear()
+
+    def _run(self):
+        due = time.perf_counter() + self.interval
+
+        while not self.stopped.wait(max(due - time.perf_counter(), 0.0)):
+
+            if self.pending.is_set():
+                self.coalesced += 1
+            else:
+                self.pending.set()
+                self.request_frame()
+
+            due += self.interval
+            now = time.perf_counter()
+
+            # Ticks missed while waiting are dropped instead of being played late
+            if due < now:
+                missed = int((now - due) / self.interval) + 1
+                self.dropped += missed
+                due += missed * self.interval
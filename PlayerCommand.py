@@ -4,73 +4,137 @@ import traceback
 
 from .Fusion360Utilities.Fusion360Utilities import AppObjects, get_default_dir
 from .Fusion360Utilities.Fusion360CommandBase import Fusion360CommandBase
+from .Fusion360Utilities.Fusion360DebugUtilities import instrumented, instrumentation, write_instrumentation_summary
+from .PlayerVisibility import VisibilityEngine
+from .PlayerDisplayState import DisplayStateSnapshot, COMPONENT_FOLDERS
+from .PlayerOccurrences import OccurrenceIndex
+from .PlayerConstruction import ConstructionCache
+from .PlayerTimeline import TimelineIndex, TimelineStep, JointTable, HealthIndex
+from .PlayerTimeline import FEATURE, SKETCH, OCCURRENCE, CONSTRUCTION, JOINT, RIGID_GROUP, GROUP
+from .PlayerHandlers import StepHandler, StepHandlerRegistry
+from .PlayerMessages import MessageCache, health_names, render_message
+from .PlayerQuery import StepQuery, QueryIndex, FilteredSequence
+from .PlayerAutoplay import FrameScheduler
+from .PlayerProfiler import StepProfiler, MARKER, RESOLVE, VISIBILITY, MESSAGE
+from .PlayerProfileStore import ProfileRun, ProfileStore, compare_runs, comparison_message
+from .PlayerTrace import TraceRecorder, cast
 
 import json
+import os
+import time
 from collections import defaultdict
 
-display_state_object = {}
+# The running playback, created by PlayFromStart or PlayFromHere and ended when the player dialog closes
+session = None
 
+# Records the API calls of the running playback when tracing
+tracer = None
 
-def show_all_occurrences():
+# Custom event fired by the autoplay scheduler to play a frame on the main thread
+AUTOPLAY_EVENT_ID = 'FusionPlayerAutoplayFrame'
+
+# Bytes of exported records buffered before they are written to the file
+EXPORT_BUFFER_SIZE = 1 << 16
+
+
+# The app objects the player works from, wrapped so every API call is recorded while tracing
+def app_objects():
     ao = AppObjects()
 
+    if tracer is not None:
+        return tracer.root(ao)
+
+    return ao
+
+
+def show_all_occurrences():
+    ao = app_objects()
+
     for occurrence in ao.root_comp.allOccurrences:
-        occurrence.isLightBulbOn = True
+        session.visibility.sweep(occurrence, 'isLightBulbOn', True)
 
 
 def hide_all_occurrences():
-    ao = AppObjects()
+    ao = app_objects()
 
     for occurrence in ao.root_comp.allOccurrences:
         occurrence.isLightBulbOn = True
 
 
 def show_occurrence(occurrence: adsk.fusion.Occurrence):
-    occurrence.isLightBulbOn = True
+    session.visibility.show(occurrence, baseline=True)
     for body in occurrence.bRepBodies:
         make_body_visible(body)
 
 
 def hide_all_bodies():
-    ao = AppObjects()
+    ao = app_objects()
 
     for component in ao.design.allComponents:
-        component.isBodiesFolderLightBulbOn = True
+        session.visibility.sweep(component, 'isBodiesFolderLightBulbOn', True)
         for body in component.bRepBodies:
-            body.isLightBulbOn = False
+            session.visibility.sweep(body, 'isLightBulbOn', False)
 
 
 def show_sketch(sketch):
-    sketch.areDimensionsShown = True
-    sketch.areConstraintsShown = True
-    sketch.areProfilesShown = True
-    sketch.isLightBulbOn = True
+    session.visibility.show(sketch, 'areDimensionsShown')
+    session.visibility.show(sketch, 'areConstraintsShown')
+    session.visibility.show(sketch, 'areProfilesShown')
+    session.visibility.show(sketch, baseline=False)
 
 
 def show_construction(entity):
-    entity.component.isConstructionFolderLightBulbOn = True
-    entity.component.isOriginFolderLightBulbOn = True
-    entity.isLightBulbOn = True
+    session.visibility.show(entity.component, 'isConstructionFolderLightBulbOn')
+    session.visibility.show(entity.component, 'isOriginFolderLightBulbOn')
+    session.visibility.show(entity, baseline=False)
 
 
 def show_joint(joint: adsk.fusion.Joint):
-    joint.parentComponent.isJointsFolderLightBulbOn = True
-    joint.isLightBulbOn = True
+    session.visibility.show(joint.parentComponent, 'isJointsFolderLightBulbOn')
+    session.visibility.show(joint, baseline=False)
 
 
+# Construction geometry is listed once per component, after that it is swept from its cached tokens
 def hide_all_construction():
-    ao = AppObjects()
-    for component in ao.design.allComponents:
-        for item in get_all_construction(component):
-            item.isLightBulbOn = False
+    ao = app_objects()
+    design = ao.design
+    cache = session.construction
+
+    for component in design.allComponents:
+        component_token = component.entityToken
+        tokens = cache.get(component_token)
+
+        if tokens is None:
+            entities = get_all_construction(component)
+            tokens = [entity.entityToken for entity in entities]
+            cache.put(component_token, tokens)
+
+            for entity, token in zip(entities, tokens):
+                session.visibility.sweep(entity, 'isLightBulbOn', False, token)
+
+        else:
+            hide_tokens(design, tokens)
+
+
+# Sweeps entities known by token to hidden, entities the engine has not seen yet are looked up
+def hide_tokens(design: adsk.fusion.Design, tokens):
+    entities = session.visibility.entities
 
+    for token in tokens:
+        entity = entities.get(token, None)
 
+        if entity is None:
+            entity = find_entity(design, token)
+
+        # Entities rolled back by a seek are not in the design at the marker
+        if entity is not None:
+            session.visibility.sweep(entity, 'isLightBulbOn', False, token)
+
+
+# The joints before the marker come from the session joint table instead of reading every joint's timeline index
 def hide_all_joints():
-    ao = AppObjects()
-    for component in ao.design.allComponents:
-        for item in component.joints:
-            if item.timelineObject.index < ao.time_line.markerPosition:
-                item.isLightBulbOn = False
+    ao = app_objects()
+    hide_tokens(ao.design, session.joints.before(ao.time_line.markerPosition))
 
 
 def get_all_construction(component: adsk.fusion.Component):
@@ -96,384 +160,1182 @@ def get_all_construction(component: adsk.fusion.Component):
 
 
 def hide_all_sketches():
-    ao = AppObjects()
+    ao = app_objects()
     for component in ao.design.allComponents:
         for sketch in component.sketches:
-            sketch.isLightBulbOn = False
+            session.visibility.sweep(sketch, 'isLightBulbOn', False)
+
+
+# A component placed after the full sweep, e.g. an inserted or linked design, brings content no step shows, it is swept
+# the way isolate sweeps the whole design and recorded as created by the step placing it.  Components listed before
+# were swept with their content already, unless this step created them, then a backward seek restored their content.
+def sweep_placed_component(occurrence: adsk.fusion.Occurrence, index: int):
+    visibility = session.visibility
+    component = occurrence.component
+    component_token = component.entityToken
+
+    session.add_created((component_token,), index)
+    construction_tokens = session.construction.get(component_token)
+
+    if construction_tokens is None or session.created[component_token] == index:
+        visibility.sweep(component, 'isBodiesFolderLightBulbOn', True, component_token)
+
+        entities = list(component.bRepBodies) + list(component.sketches) + list(component.joints)
+        tokens = [entity.entityToken for entity in entities]
 
+        for entity, token in zip(entities, tokens):
+            visibility.sweep(entity, 'isLightBulbOn', False, token)
 
+        session.add_created(tokens, index)
+
+        if construction_tokens is None:
+            entities = get_all_construction(component)
+            tokens = [entity.entityToken for entity in entities]
+            session.construction.put(component_token, tokens)
+
+            for entity, token in zip(entities, tokens):
+                visibility.sweep(entity, 'isLightBulbOn', False, token)
+
+            session.add_created(tokens, index)
+
+        else:
+            hide_tokens(app_objects().design, construction_tokens)
+
+    for child in occurrence.childOccurrences:
+        token = child.entityToken
+        visibility.sweep(child, 'isLightBulbOn', True, token)
+        session.add_created((token,), index)
+        sweep_placed_component(child, index)
+
+
+# The full sweep only runs on the first step, after that only the previous step's changes are undone
+@instrumented()
 def isolate():
-    show_all_occurrences()
-    hide_all_bodies()
-    hide_all_sketches()
-    hide_all_construction()
-    hide_all_joints()
+    session.visibility.begin_step()
 
+    if not session.visibility.is_swept:
+        show_all_occurrences()
+        hide_all_bodies()
+        hide_all_sketches()
+        hide_all_construction()
+        hide_all_joints()
+        session.visibility.is_swept = True
 
-def make_component_visible(component):
-    ao = AppObjects()
-    occurrences = ao.root_comp.allOccurrencesByComponent(component)
 
-    for occurrence in occurrences:
-        if not occurrence.isVisible:
-            occurrence.isLightBulbOn = True
+# The occurrences come from the session index instead of searching the assembly for each component
+def make_component_visible(component_token: str):
+    index = session.occurrences
 
+    if not index.is_built:
+        ao = app_objects()
+        index.build(ao.root_comp.allOccurrences)
 
-def make_body_visible(body: adsk.fusion.BRepBody):
-    parent_component = body.parentComponent
+    for occurrence in index.get(component_token):
+        session.visibility.show(occurrence, baseline=True)
 
-    was_on = parent_component.isBodiesFolderLightBulbOn
 
-    parent_component.isBodiesFolderLightBulbOn = True
+# Adds an occurrence that was just created by moving the marker over its step
+def index_new_occurrence(occurrence: adsk.fusion.Occurrence, component_token: str):
+    index = session.occurrences
 
-    body.isLightBulbOn = True
+    if not index.is_built:
+        return
+
+    # Occurrences created with children bring nested occurrences with them, those are found by indexing again
+    if occurrence.childOccurrences.count > 0:
+        index.invalidate()
+    else:
+        index.add(occurrence, component_token)
+
+
+def make_body_visible(body: adsk.fusion.BRepBody):
+    session.visibility.show(body.parentComponent, 'isBodiesFolderLightBulbOn', baseline=True)
+    session.visibility.show(body, baseline=False)
 
 
 def get_body(this_body: adsk.fusion.BRepBody):
     body = {
         "name": this_body.name,
-        "body": this_body,
-        "light_bulb": this_body.isLightBulbOn,
-        "visible": this_body.isVisible
-
+        "token": this_body.entityToken
     }
     return body
 
 
+@instrumented()
 def get_component(feature):
+    parent_component = feature.parentComponent
+
     component = {
-        "name": feature.parentComponent.name,
-        "component": feature.parentComponent,
+        "name": parent_component.name,
+        "token": parent_component.entityToken,
         "bodies": []
     }
 
     for this_body in feature.bodies:
         component["bodies"].append(get_body(this_body))
-        if not this_body.isVisible:
-            make_body_visible(this_body)
-
-    make_component_visible(feature.parentComponent)
 
     return component
 
 
-def build_display_state_object():
+def find_entity(design: adsk.fusion.Design, token: str):
+    entities = design.findEntityByToken(token)
 
-    global display_state_object
+    if entities:
+        return entities[0]
 
-    ao = AppObjects()
+    return None
+
+
+@instrumented()
+def build_display_state_object() -> DisplayStateSnapshot:
+
+    ao = app_objects()
     root_comp = ao.root_comp
 
-    display_state_object = {
-        "components": {},
-        "sketches": {},
-        "bodies": {},
-        "construction": {},
-        "origin": {},
-        "joints": {}
-    }
+    display_state_object = DisplayStateSnapshot()
 
     if root_comp is not None:
 
-        all_occurrences = ao.root_comp.allOccurrences
-
-        for occurrence in all_occurrences:
-            display_state_object[occurrence.fullPathName] = occurrence.isLightBulbOn
+        for occurrence in root_comp.allOccurrences:
+            display_state_object.capture(occurrence)
 
         for component in ao.design.allComponents:
-            display_state_object["components"][component.name] = component.isBodiesFolderLightBulbOn
-            display_state_object["sketches"][component.name] = component.isSketchFolderLightBulbOn
-            display_state_object["construction"][component.name] = component.isConstructionFolderLightBulbOn
-            display_state_object["origin"][component.name] = component.isOriginFolderLightBulbOn
-            display_state_object["joints"][component.name] = component.isJointsFolderLightBulbOn
+            display_state_object.capture(component, COMPONENT_FOLDERS)
 
             for sketch in component.sketches:
-                display_state_object["sketches"][component.name + "_" + sketch.name] = sketch.isLightBulbOn
+                display_state_object.capture(sketch)
 
             for body in component.bRepBodies:
-                display_state_object["bodies"][component.name + "_" + body.name] = body.isLightBulbOn
+                display_state_object.capture(body)
 
             for entity in get_all_construction(component):
-                display_state_object["construction"][component.name + "_" + entity.name] = entity.isLightBulbOn
+                display_state_object.capture(entity)
 
             for joint in component.joints:
-                display_state_object["joints"][component.name + "_" + joint.name] = joint.isLightBulbOn
+                display_state_object.capture(joint)
 
-    # return display_state_object
+    return display_state_object
 
 
+# Only the entities playback changed are restored
+@instrumented()
 def reset_display_state():
-    global display_state_object
+    ao = app_objects()
+    design = ao.design
 
-    ao = AppObjects()
-    root_comp = ao.root_comp
+    if design is None:
+        return
 
-    if root_comp is None:
-        return False
+    visibility = session.visibility
+    visibility.restore(session.display_state.value, lambda token: find_entity(design, token))
 
-    all_occurrences = root_comp.allOccurrences
+    # Entities are restored before a backward seek rolls them back, entities created outside of the steps played can
+    # only be restored while they exist, the marker is moved just past the latest step creating one of them and put back
+    if visibility.dirty:
+        timeline = ao.time_line
+        marker = timeline.markerPosition
+        created = session.creating_marker(set(key[0] for key in visibility.dirty))
 
-    for occurrence in all_occurrences:
-        state = display_state_object.get(occurrence.fullPathName, None)
+        if created > marker:
+            timeline.markerPosition = created
+            visibility.restore(session.display_state.value, lambda token: find_entity(design, token))
+            timeline.markerPosition = marker
 
-        if state is not None:
-            occurrence.isLightBulbOn = state
 
-    for component in ao.design.allComponents:
+# Names of the health states, built once
+HEALTH_STATE_NAMES = health_names(adsk.fusion.FeatureHealthStates,
+                                  {adsk.fusion.FeatureHealthStates.HealthyFeatureHealthState: "Healthy"})
 
-        body_folder_state = display_state_object["components"].get(component.name, None)
-        if body_folder_state is not None:
-            component.isBodiesFolderLightBulbOn = body_folder_state
 
-        sketch_folder_state = display_state_object["sketches"].get(component.name, None)
-        if sketch_folder_state is not None:
-            component.isSketchFolderLightBulbOn = sketch_folder_state
+@instrumented()
+def make_message(result):
+    return render_message(result, HEALTH_STATE_NAMES)
 
-        construction_folder_state = display_state_object["construction"].get(component.name, None)
-        if construction_folder_state is not None:
-            component.isConstructionFolderLightBulbOn = construction_folder_state
 
-        origin_folder_state = display_state_object["origin"].get(component.name, None)
-        if origin_folder_state is not None:
-            component.isOriginFolderLightBulbOn = origin_folder_state
+# Reads everything the message and visibility of a feature step need
+def resolve_feature(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    feature = cast(adsk.fusion.Feature, timeline_object.entity)
 
-        joint_folder_state = display_state_object["joints"].get(component.name, None)
-        if joint_folder_state is not None:
-            component.isJointsFolderLightBulbOn = joint_folder_state
+    step.health = timeline_object.healthState
+    step.message = timeline_object.errorOrWarningMessage
 
-        for body in component.bRepBodies:
-            body_state = display_state_object["bodies"].get(component.name + "_" + body.name, None)
-            if body_state is not None:
-                body.isLightBulbOn = body_state
+    components = [get_component(feature)]
 
-        for sketch in component.sketches:
-            sketch_state = display_state_object["sketches"].get(component.name + "_" + sketch.name, None)
-            if sketch_state is not None:
-                sketch.isLightBulbOn = sketch_state
+    for this_feature in feature.linkedFeatures:
+        components.append(get_component(this_feature))
 
-        for entity in get_all_construction(component):
-            construction_state = display_state_object["construction"].get(component.name + "_" + entity.name, None)
-            if construction_state is not None:
-                entity.isLightBulbOn = construction_state
+    step.component = components[0]["name"]
+    step.component_tokens = tuple(component["token"] for component in components)
+    step.body_tokens = tuple(body["token"] for component in components for body in component["bodies"])
+    step.details = {"components": components}
 
-        for joint in component.joints:
-            joint_state = display_state_object["joints"].get(component.name + "_" + joint.name, None)
-            if joint_state is not None:
-                joint.isLightBulbOn = joint_state
 
+def resolve_sketch(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    sketch = cast(adsk.fusion.Sketch, timeline_object.entity)
 
-def make_message(result):
-    timeline_message = "<b>Feature Information</b><br />"
-    timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Name: &nbsp;&nbsp; </b>" + result["name"] + "<br />"
-    timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Type: &nbsp;&nbsp; &nbsp;</b>" + result["type"] + "<br />"
+    step.health = sketch.healthState
+    step.message = sketch.errorOrWarningMessage
+
+    parent_component = sketch.parentComponent
+    step.component = parent_component.name
+    step.component_tokens = (parent_component.entityToken,)
+
+    step.details = {"fully_constrained": sketch.isFullyConstrained}
+
+    reference_plane = sketch.referencePlane
+
+    face = cast(adsk.fusion.BRepFace, reference_plane)
+    plane = cast(adsk.fusion.ConstructionPlane, reference_plane)
+
+    if face is not None:
+        step.details["plane"] = "Face ID: " + str(face.tempId)
+        step.details["plane_type"] = "Planar Face"
+        step.body_tokens = (face.body.entityToken,)
+
+    elif plane is not None:
+        step.details["plane"] = plane.name
+        step.details["plane_type"] = "Construction Plane"
+
+    else:
+        step.details["plane"] = "Unknown Sketch Plane"
+        step.details["plane_type"] = "unknown"
+
+
+def resolve_occurrence(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    occurrence = cast(adsk.fusion.Occurrence, timeline_object.entity)
+
+    step.component = occurrence.component.name
+    step.component_tokens = (occurrence.component.entityToken,)
+
+
+def resolve_construction(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    construction_entity = timeline_object.entity
+
+    step.health = construction_entity.healthState
+    step.message = construction_entity.errorOrWarningMessage
+
+    parent_component = construction_entity.component
+    step.component = parent_component.name
+    step.component_tokens = (parent_component.entityToken,)
+
+
+def resolve_joint(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    joint = cast(adsk.fusion.Joint, timeline_object.entity)
+
+    step.health = joint.healthState
+    step.message = joint.errorOrWarningMessage
+
+    parent_component = joint.parentComponent
+    step.component = parent_component.name
+    step.component_tokens = (parent_component.entityToken,)
+
+    occurrence_one = joint.occurrenceOne
+    occurrence_two = joint.occurrenceTwo
 
-    health_state = result.get("health_state", None)
+    step.details = {
+        "part_1_name": occurrence_one.name,
+        "part_2_name": occurrence_two.name,
+        "occurrence_tokens": (occurrence_one.entityToken, occurrence_two.entityToken)
+    }
+
+
+# Rigid groups have no geometry of their own, the step shows the occurrences they lock together
+def resolve_rigid_group(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    rigid_group = cast(adsk.fusion.RigidGroup, timeline_object.entity)
+
+    step.health = timeline_object.healthState
+    step.message = timeline_object.errorOrWarningMessage
+
+    parent_component = rigid_group.parentComponent
+    step.component = parent_component.name
+    step.component_tokens = (parent_component.entityToken,)
+
+    occurrences = list(rigid_group.occurrences)
+
+    step.details = {
+        "occurrence_names": [occurrence.name for occurrence in occurrences],
+        "occurrence_tokens": tuple(occurrence.entityToken for occurrence in occurrences)
+    }
+
+
+# Determines the kind of a timeline object with one lookup by its object type
+def classify_step(index: int, timeline_object: adsk.fusion.TimelineObject) -> TimelineStep:
+
+    if timeline_object.isGroup:
+        step = TimelineStep(index, GROUP, timeline_object.name)
+        step.is_resolved = True
+        return step
+
+    entity = timeline_object.entity
+    object_type = entity.objectType
+    step = TimelineStep(index, object_type, timeline_object.name, entity.entityToken)
+
+    handler = step_handlers.for_entity(entity, object_type)
+
+    if handler is None:
+        step.is_resolved = True
+        return step
+
+    step.kind = handler.kind
+
+    if handler.details is not None:
+        step.details = dict(handler.details)
+
+    return step
+
+
+# Reads everything the step message and visibility need, the step must be rolled forward
+def resolve_step(step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+    handler = step_handlers.for_kind(step.kind)
+
+    if handler is not None and handler.resolve is not None:
+        handler.resolve(step, timeline_object)
+
+    step.is_resolved = True
+
+
+# Indexes the whole timeline in one pass, steps beyond the marker are resolved when they are played
+def build_timeline_index(problems: HealthIndex) -> TimelineIndex:
+    ao = app_objects()
+    timeline = ao.time_line
+
+    timeline_index = TimelineIndex()
+
+    if timeline is None:
+        return timeline_index
+
+    marker = timeline.markerPosition
+
+    for index in range(timeline.count):
+        timeline_object = timeline.item(index)
+        step = classify_step(index, timeline_object)
+
+        if not step.is_resolved:
+            if index < marker:
+                resolve_step(step, timeline_object)
+                problems.update(index, step.health)
+
+            # Steps beyond the marker keep the health state of their last compute, enough to find the problems
+            else:
+                problems.update(index, timeline_object.healthState)
+
+        timeline_index.add(step)
+
+    return timeline_index
+
+
+def show_bodies(design: adsk.fusion.Design, tokens):
+    for token in tokens:
+        body = find_entity(design, token)
+        if body is not None:
+            make_body_visible(body)
+
+
+def show_feature_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
+    show_bodies(design, step.body_tokens)
+
+    for token in step.component_tokens:
+        make_component_visible(token)
+
+
+def show_sketch_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
+    show_sketch(find_entity(design, step.token))
+    make_component_visible(step.component_tokens[0])
+    show_bodies(design, step.body_tokens)
 
-    if health_state is not None:
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Health: &nbsp; </b>"
-        health = next(name for name, value in vars(adsk.fusion.FeatureHealthStates).items() if value == health_state)
 
-        if health_state == adsk.fusion.FeatureHealthStates.HealthyFeatureHealthState:
-            health = "Healthy"
+def show_occurrence_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
 
-        timeline_message += health + "<br />"
+    occurrence = find_entity(design, step.token)
+    index_new_occurrence(occurrence, step.component_tokens[0])
+    sweep_placed_component(occurrence, step.index)
+    show_occurrence(occurrence)
 
-    if result.get("type", "") == "Sketch":
-        timeline_message += "<br /><b>Sketch Information</b><br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Fully Constrained: &nbsp;&nbsp; </b>"
-        timeline_message += str(result["fully_constrained"]) + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Parent Component: &nbsp;&nbsp; </b>"
-        timeline_message += result["parent_component"] + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Sketch Plane: &nbsp;&nbsp; </b>"
-        timeline_message += result["plane"] + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Plane Type: &nbsp;&nbsp; </b>"
-        timeline_message += result["plane_type"] + "<br />"
 
-    elif result.get("type", "") == "Make Component":
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Component: &nbsp;&nbsp; </b>"
-        timeline_message += result["parent_component"] + "<br />"
+def show_construction_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
+    session.construction.add(step.token, step.component_tokens[0])
+    show_construction(find_entity(design, step.token))
+    make_component_visible(step.component_tokens[0])
 
-    elif result.get("type", "") == "Construction Geometry":
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Parent Component: &nbsp;&nbsp; </b>"
-        timeline_message += result["parent_component"] + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Type: &nbsp;&nbsp; </b>"
-        timeline_message += result["construction_type"] + "<br />"
 
-    elif result.get("type", "") == "Joint":
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Parent Component: &nbsp;&nbsp; </b>"
-        timeline_message += result["parent_component"] + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Reference 1: &nbsp;&nbsp; </b>"
-        timeline_message += result["part_1_name"] + "<br />"
-        timeline_message += "<b>&nbsp;&nbsp;&nbsp;&nbsp; Reference 2: &nbsp;&nbsp; </b>"
-        timeline_message += result["part_2_name"] + "<br />"
+def show_joint_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
+    show_joint(find_entity(design, step.token))
 
-    elif result.get("type", "") == "Feature":
-        components = result.get("components", [])
+    for token in step.details["occurrence_tokens"]:
+        show_occurrence(find_entity(design, token))
 
-        if len(components) > 0:
-            timeline_message += "<br /><b>Affected Components: </b>"
 
-            for component in components:
-                timeline_message += "<br /><b> &nbsp;&nbsp;&nbsp;&nbsp;" + component["name"] + "</b><br />"
+def show_rigid_group_step(step: TimelineStep, design: adsk.fusion.Design):
+    isolate()
 
-                bodies = component.get("bodies", [])
+    for token in step.details["occurrence_tokens"]:
+        show_occurrence(find_entity(design, token))
 
-                if len(bodies) > 0:
-                    timeline_message += "&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;"
-                    timeline_message += "Affected Bodies:<br />"
 
-                    for body in bodies:
-                        timeline_message += "&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp; "
-                        timeline_message += body["name"] + "<br />"
+def sweep_feature_step(step: TimelineStep, design: adsk.fusion.Design):
+    hide_tokens(design, step.body_tokens)
 
-    warning = result.get("error_message", "")
 
-    if len(warning) > 0:
-        timeline_message += "<br /><b>Error or Warning Message: </b><br />"
-        timeline_message += warning
+def sweep_entity_step(step: TimelineStep, design: adsk.fusion.Design):
+    hide_tokens(design, (step.token,))
 
-    return timeline_message
+
+def sweep_occurrence_step(step: TimelineStep, design: adsk.fusion.Design):
+    occurrence = find_entity(design, step.token)
+
+    if occurrence is not None:
+        session.visibility.sweep(occurrence, 'isLightBulbOn', True, step.token)
+        sweep_placed_component(occurrence, step.index)
+
+
+def sweep_construction_step(step: TimelineStep, design: adsk.fusion.Design):
+    session.construction.add(step.token, step.component_tokens[0])
+    hide_tokens(design, (step.token,))
+
+
+# Hides what a step skipped by a seek created, so the design is not swept again
+# Returns False if the entities of the step are not known, the next isolate then sweeps the whole design
+def sweep_step(step: TimelineStep) -> bool:
+    if step.kind == GROUP:
+        return True
+
+    handler = step_handlers.for_kind(step.kind)
+
+    if handler is None:
+        return False
+
+    if handler.sweep is not None:
+        handler.sweep(step, app_objects().design)
+
+    return True
+
+
+# Applies the visibility of a resolved step
+def show_step(step: TimelineStep):
+    handler = step_handlers.for_kind(step.kind)
+
+    if handler is not None and handler.show is not None:
+        handler.show(step, app_objects().design)
+
+
+# Adds the handler of an API type, entities of derived types are matched by casting them once per object type
+def register_step_handler(api_type, handler: StepHandler):
+    step_handlers.register(handler, api_type.classType(), lambda entity: cast(api_type, entity) is not None)
+
+
+# Handlers of every kind of timeline entity, probed in this order for object types not seen yet
+step_handlers = StepHandlerRegistry()
+
+register_step_handler(adsk.fusion.Feature, StepHandler(FEATURE, resolve_feature, show_feature_step,
+                                                       sweep=sweep_feature_step))
+register_step_handler(adsk.fusion.Sketch, StepHandler(SKETCH, resolve_sketch, show_sketch_step,
+                                                      sweep=sweep_entity_step))
+register_step_handler(adsk.fusion.Occurrence, StepHandler(OCCURRENCE, resolve_occurrence, show_occurrence_step,
+                                                          sweep=sweep_occurrence_step))
+for construction_api_type, construction_type in ((adsk.fusion.ConstructionPlane, "Plane"),
+                                                 (adsk.fusion.ConstructionAxis, "Axis"),
+                                                 (adsk.fusion.ConstructionPoint, "Point")):
+    register_step_handler(construction_api_type, StepHandler(CONSTRUCTION, resolve_construction, show_construction_step,
+                                                             {"construction_type": construction_type},
+                                                             sweep_construction_step))
+
+register_step_handler(adsk.fusion.Joint, StepHandler(JOINT, resolve_joint, show_joint_step, sweep=sweep_entity_step))
+register_step_handler(adsk.fusion.RigidGroup, StepHandler(RIGID_GROUP, resolve_rigid_group, show_rigid_group_step))
 
 
 def play_feature():
-    ao = AppObjects()
+    ao = app_objects()
     timeline = ao.time_line
 
     if timeline is None:
         return False
 
-    elif timeline.markerPosition == timeline.count:
+    marker = timeline.markerPosition
+
+    if marker == timeline.count:
         return False
 
-    timeline_object = timeline.item(timeline.markerPosition)
+    return play_step(timeline, marker)
 
-    result = {}
 
-    if timeline_object.isGroup:
-        timeline_object.isCollapsed = False
-        result["type"] = "group"
+# Plays the step at the marker, the marker phase times moving over it, which is the recompute of that step alone
+def play_step(timeline: adsk.fusion.Timeline, index: int):
+
+    # The index is built when playback starts, a step missing from it is indexed on its own
+    step = session.timeline_index.get(index)
+
+    if step is None:
+        step = classify_step(index, timeline.item(index))
+        session.timeline_index.add(step)
+        session.joints.add(step)
+        session.queries.add(step)
+
+    # Fusion recomputes the step while the marker moves over it
+    profiler = session.profiler
+    profiler.begin(index, step.name, step.kind, step.token)
+
+    if step.kind == GROUP:
+        with profiler.measure(index, MARKER):
+            timeline.item(index).isCollapsed = False
 
     else:
+        with profiler.measure(index, MARKER):
+            timeline.movetoNextStep()
+
+        session.furthest_marker = max(session.furthest_marker, index + 1)
+
+        if not step.is_resolved:
+            with profiler.measure(index, RESOLVE):
+                session.resolve(step, timeline.item(index))
+
+        with profiler.measure(index, VISIBILITY):
+            show_step(step)
+            session.visibility.flush()
+
+        # ao.app.activeViewport.fit()
+
+    return step.to_result()
+
+
+class AutoplayFrameHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            if session is not None:
+                session.autoplay_frame()
+
+        except:
+            app = adsk.core.Application.get()
+            ui = app.userInterface
+            if ui:
+                ui.messageBox('Autoplay frame failed: {}'.format(traceback.format_exc()))
+
+
+class PlayerSession:
+
+    def __init__(self, lazy_capture: bool = True, profile: bool = False, profile_threshold: float = 1.5):
 
-        timeline.movetoNextStep()
-
-
-        result["entity"] = timeline_object.entity
-        result["index"] = timeline_object.index
-        result["suppressed"] = timeline_object.isSuppressed
-        result["name"] = timeline_object.name
-
-        feature = adsk.fusion.Feature.cast(timeline_object.entity)
-        sketch = adsk.fusion.Sketch.cast(timeline_object.entity)
-        occurrence = adsk.fusion.Occurrence.cast(timeline_object.entity)
-        plane = adsk.fusion.ConstructionPlane.cast(timeline_object.entity)
-        axis = adsk.fusion.ConstructionAxis.cast(timeline_object.entity)
-        point = adsk.fusion.ConstructionPoint.cast(timeline_object.entity)
-        joint = adsk.fusion.Joint.cast(timeline_object.entity)
-
-        if plane is not None:
-            construction_entity = plane
-            construction_type = "Plane"
-        elif axis is not None:
-            construction_entity = axis
-            construction_type = "Axis"
-        elif point is not None:
-            construction_entity = point
-            construction_type = "Point"
+        # With lazy capture the original display state of an entity is read just before it is first changed
+        if lazy_capture:
+            self.display_state = DisplayStateSnapshot()
         else:
-            construction_entity = None
-            construction_type = ""
-
-        if feature is not None:
-            isolate()
-            result["error_message"] = timeline_object.errorOrWarningMessage
-            result["health_state"] = timeline_object.healthState
-            result["type"] = "Feature"
-            result["feature"] = feature
-            result["components"] = []
-            result["components"].append(get_component(feature))
-
-            if feature.linkedFeatures.count > 0:
-                for this_feature in feature.linkedFeatures:
-                    result["components"].append(get_component(this_feature))
-
-        elif sketch is not None:
-            isolate()
-            show_sketch(sketch)
-            make_component_visible(sketch.parentComponent)
-
-            result["error_message"] = sketch.errorOrWarningMessage
-            result["health_state"] = sketch.healthState
-            result["type"] = "Sketch"
-            result["sketch"] = sketch
-            result["fully_constrained"] = sketch.isFullyConstrained
-            result["parent_component"] = sketch.parentComponent.name
-            reference_plane = sketch.referencePlane
-
-            face = adsk.fusion.BRepFace.cast(reference_plane)
-            plane = adsk.fusion.ConstructionPlane.cast(reference_plane)
-
-            if face is not None:
-                result["plane"] = "Face ID: " + str(face.tempId)
-                result["plane_type"] = "Planar Face"
-                result["plane_entity"] = face
-                make_body_visible(face.body)
-
-            elif plane is not None:
-                result["plane"] = plane.name
-                result["plane_type"] = "Construction Plane"
-                result["plane_entity"] = plane
+            self.display_state = build_display_state_object()
 
-            else:
-                result["plane"] = "Unknown Sketch Plane"
-                result["plane_type"] = "unknown"
-                result["plane_entity"] = reference_plane
-
-        elif occurrence is not None:
-            isolate()
-            show_occurrence(occurrence)
-            result["type"] = "Make Component"
-            result["occurrence"] = occurrence
-            result["parent_component"] = occurrence.component.name
-
-        elif construction_entity is not None:
-            isolate()
-            show_construction(construction_entity)
-            make_component_visible(construction_entity.component)
-
-            result["error_message"] = construction_entity.errorOrWarningMessage
-            result["health_state"] = construction_entity.healthState
-            result["type"] = "Construction Geometry"
-            result["construction_type"] = construction_type
-            result["construction_entity"] = construction_entity
-            result["parent_component"] = construction_entity.component.name
-
-        elif joint is not None:
-            isolate()
-            show_joint(joint)
-            show_occurrence(joint.occurrenceOne)
-            show_occurrence(joint.occurrenceTwo)
-
-            result["error_message"] = joint.errorOrWarningMessage
-            result["health_state"] = joint.healthState
-            result["type"] = "Joint"
-            result["joint"] = joint
-            result["part_1"] = joint.occurrenceOne
-            result["part2"] = joint.occurrenceTwo
-            result["part_1_name"] = joint.occurrenceOne.name
-            result["part_2_name"] = joint.occurrenceTwo.name
-            result["parent_component"] = joint.parentComponent.name
+        self.visibility = VisibilityEngine()
+
+        if lazy_capture:
+            self.visibility.capture = self.display_state.capture_property
+
+        # Steps with an error or warning, the player jumps between them instead of stepping over every healthy step
+        self.problems = HealthIndex(adsk.fusion.FeatureHealthStates.HealthyFeatureHealthState)
+
+        self.timeline_index = build_timeline_index(self.problems)
+        self.joints = JointTable(self.timeline_index)
+
+        # Steps by type, component and name, filters select the steps to play from them
+        self.queries = QueryIndex(self.timeline_index)
+        self.filter = None
+
+        # Built on first use and rebuilt after seeking, stepping forward adds the occurrences each step creates
+        self.occurrences = OccurrenceIndex()
+
+        # Built by the first sweep, construction steps add the geometry they create
+        self.construction = ConstructionCache()
+
+        self.profiler = StepProfiler(profile)
+        self.profile_threshold = profile_threshold
+
+        self.result = None
+        self.message = ""
+
+        # Furthest the marker was moved, every entity playback changed exists with the marker there
+        self.furthest_marker = 0
+
+        # Timeline index of the step creating each entity by entity token, for the entities of the steps resolved
+        self.created = {}
+
+        for step in self.timeline_index:
+            self.add_step_created(step)
+
+        # Rendered step messages, stepping back to a step shows its message again without rendering it
+        self.messages = MessageCache(make_message)
+        self.is_at_end = False
+
+        # Inputs of the open player dialog, autoplay frames update them outside of any command event
+        self.inputs = None
+
+        self.autoplay = None
+        self.autoplay_handler = None
+
+    def step(self) -> bool:
+        """
+        Plays the step at the marker and builds its message
+        :return: False if the marker was already at the end of the timeline
+        :rtype: bool
+        """
+        if tracer is not None:
+            tracer.action('step')
+
+        if self.filter is not None:
+            return self.next_match()
+
+        return self.show_result(play_feature())
+
+    def seek(self, index: int) -> bool:
+        """
+        Jumps straight to a step with a single marker move, the steps in between are not played
+        :param index: Timeline index of the step to play
+        :return: False if there is no such step
+        :rtype: bool
+        """
+        if tracer is not None:
+            tracer.action('seek', index)
+
+        return self.jump(index)
+
+    def jump(self, index: int, marker: int = None) -> bool:
+        """
+        Seeks without recording a player action, for actions that seek as part of what they do
+        :param index: Timeline index of the step to play
+        :param marker: Marker position of the step shown, if the marker was moved since to resolve steps
+        :return: False if there is no such step
+        :rtype: bool
+        """
+        ao = app_objects()
+        timeline = ao.time_line
+
+        if timeline is None or not 0 <= index < timeline.count:
+            return False
+
+        if marker is None:
+            marker = timeline.markerPosition
+
+        # Entities of the steps rolled back can no longer be changed, their light bulbs are restored while they exist
+        if index < marker:
+            self.restore_created(index, marker)
+
+        # The steps in between are recomputed or rolled back by moving the marker up to the step, that is not part of
+        # the step's own profile, then the step is played like any other
+        timeline.markerPosition = index
+
+        if index > marker:
+            self.sweep_skipped(timeline, marker, index)
+
+        # The occurrences only change if the marker moved over a step creating occurrences
+        if self.creates_occurrences(min(marker, index), max(marker, index)):
+            self.occurrences.invalidate()
+
+        return self.show_result(play_step(timeline, index))
+
+    def creates_occurrences(self, start: int, end: int) -> bool:
+        """
+        :param start: Timeline index of the first step
+        :param end: Timeline index after the last step
+        :return: True if a step in the range creates occurrences or is not known
+        :rtype: bool
+        """
+        for index in range(start, end):
+            step = self.timeline_index.get(index)
+
+            if step is None or step.kind == OCCURRENCE or (step.kind != GROUP and
+                                                             step_handlers.for_kind(step.kind) is None):
+                return True
+
+        return False
+
+    def sweep_skipped(self, timeline: adsk.fusion.Timeline, start: int, end: int):
+        """
+        Hides the entities created by the steps a forward seek skipped, they were never seen by the visibility engine.
+        Only if a skipped step creates entities no handler knows the next isolate sweeps the whole design again.
+        :param timeline: The timeline, with the marker at the end of the skipped steps
+        :param start: Timeline index of the first step skipped
+        :param end: Timeline index after the last step skipped
+        """
+        for index in range(start, end):
+            step = self.timeline_index.get(index)
+
+            if step is None:
+                self.visibility.is_swept = False
+                continue
+
+            # Every step before the marker is resolved, so the step creating each entity playback changes is known
+            if not step.is_resolved:
+                self.resolve(step, timeline.item(index))
+
+            if self.visibility.is_swept and not sweep_step(step):
+                self.visibility.is_swept = False
+
+            # The full sweep lists construction geometry from the cache, geometry of skipped steps is added to it
+            if not self.visibility.is_swept and step.kind == CONSTRUCTION:
+                self.construction.add(step.token, step.component_tokens[0])
+
+    def resolve(self, step: TimelineStep, timeline_object: adsk.fusion.TimelineObject):
+        """
+        Reads a step rolled forward for the first time and adds what was read to the session indexes
+        :param step: The step, unresolved
+        :param timeline_object: Its timeline object
+        """
+        resolve_step(step, timeline_object)
+
+        self.problems.update(step.index, step.health)
+        self.queries.resolve(step)
+        self.add_step_created(step)
+
+        # The filter kept the step because its component was not known yet
+        if self.filter is not None and not self.filter.query.matches(step):
+            self.filter.discard(step.index)
+
+    def add_created(self, tokens, index: int):
+        """
+        Records the step creating entities, an entity is created by the first step that refers to it
+        :param tokens: Entity tokens
+        :param index: Timeline index of the step
+        """
+        created = self.created
+
+        for token in tokens:
+            if token and created.get(token, index) >= index:
+                created[token] = index
+
+    def add_step_created(self, step: TimelineStep):
+        """
+        Records the entities a step creates, its own entity, the bodies of a feature and the component of an occurrence
+        :param step: The step, the tokens of unresolved steps are added again once they are resolved
+        """
+        self.add_created((step.token,), step.index)
+
+        if step.kind == FEATURE:
+            self.add_created(step.body_tokens, step.index)
+
+        elif step.kind == OCCURRENCE:
+            self.add_created(step.component_tokens, step.index)
+
+    def restore_created(self, start: int, end: int):
+        """
+        Restores the light bulbs playback changed on the entities created by a range of steps, before they are rolled
+        back and can no longer be changed
+        :param start: Timeline index of the first step rolled back
+        :param end: Timeline index after the last step rolled back
+        """
+        created = self.created
+        tokens = set(key[0] for key in self.visibility.dirty if start <= created.get(key[0], -1) < end)
+
+        if tokens:
+            design = app_objects().design
+            self.visibility.restore(self.display_state.value, lambda token: find_entity(design, token), tokens)
+
+    def creating_marker(self, tokens) -> int:
+        """
+        Finds where the marker has to be for entities to exist
+        :param tokens: Entity tokens
+        :return: Marker position after the latest step creating one of the entities, the furthest marker playback
+            reached if the step creating one of them is not known
+        :rtype: int
+        """
+        created = self.created
+        marker = max(created[token] + 1 if token in created else self.furthest_marker for token in tokens)
+
+        return min(marker, self.furthest_marker)
+
+    def previous(self) -> bool:
+        """
+        Goes back one step, this is a seek so it costs a single step no matter how far playback has come
+        :return: False if the first step is already shown
+        :rtype: bool
+        """
+        if tracer is not None:
+            tracer.action('previous')
+
+        if self.result is None:
+            return False
+
+        index = self.result["index"]
+
+        if self.filter is not None:
+            return self.match_from(self.filter.last_before(index), self.filter.last_before)
+
+        # At the end of the timeline the last step played is no longer shown
+        if not self.is_at_end:
+            index -= 1
+
+        return self.jump(index)
+
+    def set_filter(self, text: str) -> int:
+        """
+        Plays only the steps matching a query from now on, see PlayerQuery
+        :param text: The query, an empty query plays every step again
+        :return: Number of steps that may match
+        :rtype: int
+        """
+        if tracer is not None:
+            tracer.action('filter', text)
+
+        query = StepQuery(text)
+
+        if not query:
+            self.filter = None
+            return len(self.timeline_index)
+
+        self.filter = FilteredSequence(query, self.queries.select(query))
+        return len(self.filter)
+
+    def next_match(self) -> bool:
+        """
+        Jumps to the next step matching the filter
+        :return: False if there is no match after the step shown
+        :rtype: bool
+        """
+        shown = self.result["index"] if self.result else -1
+
+        return self.match_from(self.filter.next_after(shown), self.filter.next_after)
+
+    def seek_match(self, position: int) -> bool:
+        """
+        Jumps to a step of the filtered sequence, or to the next match if the step turns out not to match
+        :param position: Position of the step among the matching steps
+        :return: False if there is no such step
+        :rtype: bool
+        """
+        if tracer is not None:
+            tracer.action('seek_match', position)
+
+        if not 0 <= position < len(self.filter):
+            return False
+
+        return self.match_from(self.filter.indexes[position], self.filter.next_after)
+
+    def match_from(self, index, following) -> bool:
+        """
+        Jumps to the first step of the filter that matches, testing the candidates on the way
+        :param index: Timeline index of the first candidate, None if there is none
+        :param following: Gives the candidate after a candidate that does not match, next_after or last_before
+        :return: False if no candidate matches
+        :rtype: bool
+        """
+        timeline = app_objects().time_line
+
+        if timeline is None:
+            return False
+
+        marker = timeline.markerPosition
+
+        while index is not None:
+            if self.is_match(timeline, index):
+                return self.jump(index, marker)
+
+            self.filter.discard(index)
+            index = following(index)
+
+        # Candidates resolved on the way turned out not to match, the step that was shown stays shown
+        if timeline.markerPosition != marker:
+            timeline.markerPosition = marker
+
+        return False
+
+    def is_match(self, timeline: adsk.fusion.Timeline, index: int) -> bool:
+        """
+        Tests a candidate of the filter, a step whose component was not known when the filter was set is resolved by
+        moving the marker past it without playing it, the steps on the way are not shown or swept
+        :param timeline: The timeline
+        :param index: Timeline index of the candidate
+        :rtype: bool
+        """
+        step = self.timeline_index.get(index)
+
+        if step is None:
+            return False
+
+        if not step.is_resolved:
+            if timeline.markerPosition <= index:
+                timeline.markerPosition = index + 1
+
+            self.resolve(step, timeline.item(index))
+
+        return self.filter.query.matches(step)
+
+    def match_count(self) -> str:
+        """
+        :return: Number of matching steps, the steps not played yet whose component is not known are counted apart
+        :rtype: str
+        """
+        timeline_index = self.timeline_index
+        unchecked = sum(1 for index in self.filter.indexes if not timeline_index.get(index).is_resolved)
+
+        text = "%d of %d steps" % (len(self.filter) - unchecked, len(timeline_index))
+
+        if unchecked:
+            text += ", %d more to check" % unchecked
 
+        return text
+
+    def next_problem(self) -> bool:
+        """
+        Jumps to the next step with an error or warning
+        :return: False if there is no problem after the step shown
+        :rtype: bool
+        """
+        index = self.problems.next_after(self.result["index"] if self.result else -1)
+
+        if index is None:
+            return False
+
+        return self.seek(index)
+
+    def previous_problem(self) -> bool:
+        """
+        Jumps back to the previous step with an error or warning
+        :return: False if there is no problem before the step shown
+        :rtype: bool
+        """
+        if self.result is None:
+            return False
+
+        index = self.problems.last_before(self.result["index"])
+
+        if index is None:
+            return False
+
+        return self.seek(index)
+
+    def show_result(self, result) -> bool:
+        if result:
+            self.result = result
+
+            with self.profiler.measure(result["index"], MESSAGE):
+                self.message = self.messages.get(result)
+
+            self.is_at_end = False
+            return True
+
+        self.message = "You are at the end of the timeline.  " \
+                       "Rollback to use Player to step through the features in the timeline"
+        self.is_at_end = True
+        return False
+
+    def start_autoplay(self, rate: float):
+        """
+        Plays the following steps on a timer until the end of the timeline or until stopped
+        :param rate: Steps per second
+        """
+        self.stop_autoplay()
+
+        ao = AppObjects()
+        app = ao.app
+
+        event = app.registerCustomEvent(AUTOPLAY_EVENT_ID)
+        self.autoplay_handler = AutoplayFrameHandler()
+        event.add(self.autoplay_handler)
+
+        self.autoplay = FrameScheduler(lambda: app.fireCustomEvent(AUTOPLAY_EVENT_ID, ''), rate)
+        self.autoplay.start()
+
+    def stop_autoplay(self):
+        if self.autoplay is not None:
+            self.autoplay.stop()
+
+        if self.autoplay_handler is not None:
+            ao = AppObjects()
+            ao.app.unregisterCustomEvent(AUTOPLAY_EVENT_ID)
+            self.autoplay_handler = None
+
+    def autoplay_frame(self):
+        if self.autoplay is None or not self.autoplay.is_running:
+            return
+
+        if not self.step():
+            self.stop_autoplay()
+
+        self.autoplay.frame_done()
+
+        if self.inputs is not None:
+            self.update_dialog(self.inputs)
+
+    def update_dialog(self, inputs: adsk.core.CommandInputs):
+        shown = self.result["index"] if self.result else -1
+        seek_input = inputs.itemById("seek_id")
+
+        inputs.itemById("message_id").formattedText = self.message
+
+        if self.filter is None:
+            inputs.itemById("next_id").isEnabled = not self.is_at_end
+            inputs.itemById("previous_id").isEnabled = self.result is not None and (self.is_at_end or shown > 0)
+            inputs.itemById("matches_id").text = ""
+
+            seek_input.maximumValue = max(len(self.timeline_index), 1)
+
+            if self.result:
+                seek_input.value = shown + 1
+
+        # Next, previous and go to step move through the matching steps only
         else:
-            result["type"] = timeline_object.entity.objectType
+            position = self.filter.position(shown)
 
-        # ao.app.activeViewport.fit()
+            inputs.itemById("next_id").isEnabled = self.filter.next_after(shown) is not None
+            inputs.itemById("previous_id").isEnabled = self.filter.last_before(shown) is not None
+            inputs.itemById("matches_id").text = self.match_count()
 
-    return result
+            seek_input.maximumValue = max(len(self.filter), 1)
 
+            if position is not None:
+                seek_input.value = position + 1
+
+        inputs.itemById("next_problem_id").isEnabled = self.problems.next_after(shown) is not None
+        inputs.itemById("previous_problem_id").isEnabled = self.problems.last_before(shown) is not None
+
+        is_playing = self.autoplay is not None and self.autoplay.is_running
+        inputs.itemById("autoplay_id").value = is_playing
+
+        if self.autoplay is not None:
+            inputs.itemById("frame_rate_id").text = "%0.1f steps/s, %d frames dropped" % (
+                self.autoplay.achieved_rate, self.autoplay.dropped + self.autoplay.coalesced)
+
+    def end(self):
+        if tracer is not None:
+            tracer.action('end')
+
+        self.stop_autoplay()
+        reset_display_state()
+
+        save_trace()
+
+        if self.profiler.is_enabled and self.profiler.steps:
+            ao = app_objects()
+            ao.ui.messageBox(self.profiler.report() + '\n' + self.save_profile(), "Player Profile")
+
+    def save_profile(self) -> str:
+        """
+        Appends the profile of this playback to the history of the document and compares it with the previous run
+        :return: The comparison message
+        :rtype: str
+        """
+        ao = app_objects()
+        document = ao.document
+        data_file = document.dataFile
+
+        # Documents that were never saved have no data file
+        if data_file is not None:
+            document_id = data_file.id
+            version = data_file.versionNumber
+        else:
+            document_id = document.name
+            version = 0
+
+        store = ProfileStore(os.path.join(get_default_dir('FusionPlayer'), 'Profiles'))
+
+        baseline = store.latest(document_id)
+        run = ProfileRun.from_profiler(self.profiler, document_id, version)
+
+        store.append(run)
+
+        if baseline is None:
+            return 'First profile of this document\n'
+
+        return comparison_message(baseline, compare_runs(baseline, run, self.profile_threshold))
+
+
+def start_playback(lazy_capture: bool = True, profile: bool = False, profile_threshold: float = 1.5,
+                   trace: bool = False):
+    global session, tracer
+
+    if trace:
+        tracer = TraceRecorder({"lazy_capture": lazy_capture})
+
+    session = PlayerSession(lazy_capture, profile, profile_threshold)
+
+
+# Writes the API calls recorded during playback to a trace file and stops recording
+def save_trace():
+    global tracer
+
+    if tracer is None:
+        return
+
+    recorder = tracer
+    tracer = None
+
+    trace_dir = os.path.join(get_default_dir('FusionPlayer'), 'Traces')
+
+    if not os.path.exists(trace_dir):
+        os.makedirs(trace_dir)
+
+    time_stamp = time.strftime("%Y-%m-%d-%H-%M-%S", time.gmtime())
+    trace_file_name = os.path.join(trace_dir, 'PlayerTrace-' + time_stamp + '.jsonl')
+
+    recorder.save(trace_file_name)
 
-def more_features():
     ao = AppObjects()
+    ao.ui.messageBox('API trace of ' + str(len(recorder.entries)) + ' calls saved to:\n' + trace_file_name,
+                     "Player Trace")
+
+
+# One export record, the values the player shows for the step plus the name of its health state
+def make_export_record(step: TimelineStep) -> dict:
+    record = step.to_result()
+
+    if step.health is not None:
+        record["health"] = HEALTH_STATE_NAMES.get(step.health, str(step.health))
+
+    return record
+
+
+# Walks the timeline once and writes one JSON line per step as it goes, no step is kept once it is written
+def export_timeline(file_name: str) -> int:
+    ao = app_objects()
+    timeline = ao.time_line
+
+    if timeline is None:
+        return 0
+
+    # Steps can only be read rolled forward, the marker is put back when the export is done
+    marker = timeline.markerPosition
+
+    if marker < timeline.count:
+        timeline.moveToEnd()
+
+    count = 0
+
+    try:
+        with open(file_name, 'w', buffering=EXPORT_BUFFER_SIZE) as export_file:
+
+            for index in range(timeline.count):
+                timeline_object = timeline.item(index)
+                step = classify_step(index, timeline_object)
+
+                if not step.is_resolved:
+                    resolve_step(step, timeline_object)
+
+                export_file.write(json.dumps(make_export_record(step), separators=(',', ':')) + '\n')
+                count += 1
+
+    finally:
+        if marker < timeline.count:
+            timeline.markerPosition = marker
+
+    return count
+
+
+def end_playback():
+    global session
+
+    if session is not None:
+        session.end()
+        session = None
+
+    # The percentiles of the spans of each playback are written next to the span file
+    if instrumentation.is_enabled:
+        write_instrumentation_summary()
+        instrumentation.flush()
+
+
+def more_features():
+    ao = app_objects()
     timeline = ao.time_line
 
     if timeline is None:
@@ -491,6 +1353,12 @@ def more_features():
 # Delete the line that says "pass" for any method you want to use
 class PlayerCommand(Fusion360CommandBase):
 
+    def __init__(self, cmd_def, debug):
+        super().__init__(cmd_def, debug)
+
+        # Steps per second when autoplay starts
+        self.autoplay_rate = cmd_def.get('autoplay_rate', 2.0)
+
     # Run whenever a user makes any change to a value or selection in the addin UI
     # Commands in here will be run through the Fusion processor and changes will be reflected in  Fusion graphics area
     def on_preview(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
@@ -499,80 +1367,152 @@ class PlayerCommand(Fusion360CommandBase):
     # Run after the command is finished.
     # Can be used to launch another command automatically or do other clean up.
     def on_destroy(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, reason, input_values):
-        if reason == adsk.core.CommandTerminationReason.CancelledTerminationReason or \
-                reason == adsk.core.CommandTerminationReason.PreEmptedTerminationReason:
-            reset_display_state()
+        end_playback()
 
     # Run when any input is changed.
     # Can be used to check a value and then update the add-in UI accordingly
     def on_input_changed(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, changed_input,
                          input_values):
-        # ao = AppObjects()
-        # if changed_input.id == "play_controls_id":
-        #     button = changed_input.selectedItem
-        #     if button is not None:
-        #         if button.name == "play":
-        #             if more_features():
-        #                 ao.ui.commandDefinitions.itemById("cmdID_PlayerCommand").execute()
-        # button.isSelected = False
 
-        pass
+        # The dialog stays open for the whole playback, each step updates it in place
+        if changed_input.id == "autoplay_id":
+            if input_values["autoplay_id"]:
+                session.start_autoplay(input_values["rate_id"])
+            else:
+                session.stop_autoplay()
+
+        elif changed_input.id == "rate_id":
+            if session.autoplay is not None and session.autoplay.is_running:
+                session.start_autoplay(input_values["rate_id"])
+
+        # Stepping by hand stops autoplay
+        elif changed_input.id == "next_id":
+            session.stop_autoplay()
+            session.step()
+
+        elif changed_input.id == "previous_id":
+            session.stop_autoplay()
+            session.previous()
+
+        elif changed_input.id == "next_problem_id":
+            session.stop_autoplay()
+            session.next_problem()
+
+        elif changed_input.id == "previous_problem_id":
+            session.stop_autoplay()
+            session.previous_problem()
+
+        elif changed_input.id == "seek_id":
+            session.stop_autoplay()
+
+            if session.filter is not None:
+                session.seek_match(input_values["seek_id"] - 1)
+            else:
+                session.seek(input_values["seek_id"] - 1)
+
+        elif changed_input.id == "filter_id":
+            session.stop_autoplay()
+            session.set_filter(input_values["filter_id"])
+
+        else:
+            return
+
+        session.update_dialog(inputs)
 
     # Run when the user presses OK
     # This is typically where your main program logic would go
     def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
-        ao = AppObjects()
-        if more_features():
-            ao.ui.commandDefinitions.itemById("cmdID_PlayerCommand").execute()
-        else:
-            reset_display_state()
+        end_playback()
 
     # Run when the user selects your command icon from the Fusion 360 UI
     # Typically used to create and display a command dialog box
     # The following is a basic sample of a dialog UI
     def on_create(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs):
 
-        result = play_feature()
+        if session is None:
+            start_playback()
 
-        if result:
-            message = make_message(result)
-            command.okButtonText = "Next"
-            command.cancelButtonText = "Done"
+        session.step()
 
-        else:
-            message = "You are already at the end of the timeline.  " \
-                      "Rollback to use Player to step through the features in the timeline"
+        command.okButtonText = "Done"
 
-        inputs.addTextBoxCommandInput("message_id", "", message, 20, True)
+        ao = AppObjects()
+        step_count = max(ao.time_line.count, 1)
 
-        # button_row = inputs.addButtonRowCommandInput("play_controls_id", "Controls: ", False)
-        # button_row.listItems.add("play", False, "./resources", -1)
-        # button_row.listItems.add("stop", False, "./resources", -1)
+        inputs.addTextBoxCommandInput("message_id", "", session.message, 20, True)
+        inputs.addBoolValueInput("previous_id", "Previous", False, "", False)
+        inputs.addBoolValueInput("next_id", "Next", False, "", False)
+        inputs.addBoolValueInput("previous_problem_id", "Previous Problem", False, "", False)
+        inputs.addBoolValueInput("next_problem_id", "Next Problem", False, "", False)
+        inputs.addStringValueInput("filter_id", "Filter", "")
+        inputs.addTextBoxCommandInput("matches_id", "Matching Steps", "", 1, True)
+        inputs.addIntegerSpinnerCommandInput("seek_id", "Go To Step", 1, step_count, 1, 1)
 
-        # inputs.addTextBoxCommandInput("message_id", "", str(result), 20, True)
+        inputs.addBoolValueInput("autoplay_id", "Autoplay", True, "", False)
+        inputs.addFloatSpinnerCommandInput("rate_id", "Steps Per Second", "", 0.1, 30.0, 0.5, self.autoplay_rate)
+        inputs.addTextBoxCommandInput("frame_rate_id", "Achieved Rate", "", 1, True)
 
+        session.inputs = inputs
+        session.update_dialog(inputs)
 
-class PlayFromHereCommand(Fusion360CommandBase):
 
-    def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
-        global display_state_object
+# Playback settings shared by the commands that start playback
+class PlaybackCommand(Fusion360CommandBase):
+
+    def __init__(self, cmd_def, debug):
+        super().__init__(cmd_def, debug)
+
+        # Read the original display state of each entity only when playback first changes it
+        self.lazy_capture = cmd_def.get('lazy_capture', True)
+
+        # Time the recompute, visibility and message of every step and report the slowest when playback ends
+        self.profile = cmd_def.get('profile', False)
+
+        # Steps whose recompute time grows by more than this ratio since the last profile are reported
+        self.profile_threshold = cmd_def.get('profile_threshold', 1.5)
 
+        # Record every Fusion API call of the playback to a trace file that can be replayed without Fusion
+        self.trace = cmd_def.get('trace', False)
+
+    def start_playback(self):
+        start_playback(self.lazy_capture, self.profile, self.profile_threshold, self.trace)
+
+
+class PlayFromHereCommand(PlaybackCommand):
+
+    def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
         ao = AppObjects()
 
-        build_display_state_object()
+        self.start_playback()
 
         ao.ui.commandDefinitions.itemById("cmdID_PlayerCommand").execute()
 
 
-class PlayFromStartCommand(Fusion360CommandBase):
+class ExportTimelineCommand(Fusion360CommandBase):
 
     def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
-        global display_state_object
+        ao = AppObjects()
+
+        export_dir = os.path.join(get_default_dir('FusionPlayer'), 'Exports')
+
+        if not os.path.exists(export_dir):
+            os.makedirs(export_dir)
+
+        time_stamp = time.strftime("%Y-%m-%d-%H-%M-%S", time.gmtime())
+        export_file_name = os.path.join(export_dir, 'PlayerExport-' + time_stamp + '.ndjson')
+
+        count = export_timeline(export_file_name)
 
+        ao.ui.messageBox(str(count) + ' timeline steps exported to:\n' + export_file_name, "Player Export")
+
+
+class PlayFromStartCommand(PlaybackCommand):
+
+    def on_execute(self, command: adsk.core.Command, inputs: adsk.core.CommandInputs, args, input_values):
         ao = AppObjects()
 
-        build_display_state_object()
+        self.start_playback()
 
         ao.time_line.moveToBeginning()
 
-        ao.ui.commandDefinitions.itemById("cmdID_PlayerCommand").execute()
\ No newline at end of file
+        ao.ui.commandDefinitions.itemById("cmdID_PlayerCommand").execute()
@@ -0,0 +1,51 @@
+# Construction geometry of every component, held as entity tokens
+#
+# Listing the construction geometry of a component means reading three collections and the seven origin entities.
+# The cache below does that once per component for the whole playback and is then only extended with the geometry
+# created by the construction steps the player moves over.
+
+
+class ConstructionCache:
+
+    def __init__(self):
+
+        # Construction entity tokens by component token
+        self.components = {}
+
+        self._known = set()
+
+    def get(self, component_token: str):
+        """
+        :param component_token: Entity token of a component
+        :return: The construction entity tokens of the component or None if it was never listed
+        :rtype: list
+        """
+        return self.components.get(component_token, None)
+
+    def put(self, component_token: str, tokens):
+        """
+        Stores the full list of construction entity tokens of a component
+        :param component_token: Entity token of the component
+        :param tokens: Tokens of every construction entity of the component, including the origin
+        """
+        tokens = list(tokens)
+        self.components[component_token] = tokens
+        self._known.update(tokens)
+
+    def add(self, token: str, component_token: str):
+        """
+        Adds construction geometry created by a timeline step
+        :param token: Entity token of the construction entity
+        :param component_token: Entity token of its component
+        """
+        if token in self._known:
+            return
+
+        tokens = self.components.get(component_token, None)
+
+        # Components not listed yet pick the geometry up when they are
+        if tokens is None:
+            return
+
+        tokens.append(token)
+        self._known.add(token)
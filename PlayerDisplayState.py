@@ -0,0 +1,88 @@
+# Compact snapshot of the display state of a design
+#
+# Every captured entity gets one slot holding its light bulb values packed as bits in a single byte.  Slots are keyed
+# by entity token, so two components or bodies sharing a name can not collide, and no live entities are kept.
+
+# Entity kinds and the light bulb properties packed into their slot, in bit order
+LIGHT_BULB = 0
+COMPONENT_FOLDERS = 1
+
+PROPERTIES = (
+    ('isLightBulbOn',),
+    ('isBodiesFolderLightBulbOn', 'isSketchFolderLightBulbOn', 'isConstructionFolderLightBulbOn',
+     'isOriginFolderLightBulbOn', 'isJointsFolderLightBulbOn'),
+)
+
+# Entity kind owning each light bulb property
+PROPERTY_KINDS = {prop: kind for kind, properties in enumerate(PROPERTIES) for prop in properties}
+
+
+class DisplayStateSnapshot:
+
+    def __init__(self):
+        self.kinds = bytearray()
+        self.flags = bytearray()
+
+        # Slot number of every captured token, in slot order
+        self.slots = {}
+
+    def __len__(self):
+        return len(self.flags)
+
+    def capture(self, entity, kind: int = LIGHT_BULB) -> int:
+        """
+        Reads the light bulb values of an entity into a new slot, entities already captured are skipped.
+        :param entity: Any Fusion entity with an entityToken
+        :param kind: LIGHT_BULB or COMPONENT_FOLDERS
+        :return: The slot of the entity
+        :rtype: int
+        """
+        token = entity.entityToken
+
+        slot = self.slots.get(token, None)
+        if slot is not None:
+            return slot
+
+        bits = 0
+        for bit, prop in enumerate(PROPERTIES[kind]):
+            if getattr(entity, prop):
+                bits |= 1 << bit
+
+        slot = len(self.flags)
+        self.slots[token] = slot
+        self.kinds.append(kind)
+        self.flags.append(bits)
+
+        return slot
+
+    def capture_property(self, entity, prop: str):
+        """
+        Captures the entity owning a light bulb property, used to capture lazily just before the first change.
+        Properties that are not light bulbs are not captured.
+        :param entity: Any Fusion entity with an entityToken
+        :param prop: Name of the property about to change
+        """
+        kind = PROPERTY_KINDS.get(prop, None)
+
+        if kind is not None:
+            self.capture(entity, kind)
+
+    def value(self, token: str, prop: str):
+        """
+        Returns the captured value of one light bulb property.
+        :param token: The entity token of the entity
+        :param prop: Name of the light bulb property
+        :return: The captured value or None if the entity or property was not captured
+        :rtype: bool
+        """
+        slot = self.slots.get(token, None)
+
+        if slot is None:
+            return None
+
+        properties = PROPERTIES[self.kinds[slot]]
+
+        if prop not in properties:
+            return None
+
+        return bool(self.flags[slot] & (1 << properties.index(prop)))
@@ -0,0 +1,87 @@
+# Step handlers of the player, looked up by the object type of the timeline entity
+#
+# Every kind of timeline entity the player handles has one StepHandler.  The handler is found by the objectType of the
+# entity with a single dictionary lookup.  Object types that are not registered, e.g. the many feature types, are
+# matched by trying the probes in registration order once, and the result is cached for that object type.
+#
+# New entity kinds are handled by registering a handler, nothing else in the player has to change.
+
+
+class StepHandler:
+    __slots__ = ('kind', 'resolve', 'show', 'details', 'sweep')
+
+    def __init__(self, kind: str, resolve=None, show=None, details: dict = None, sweep=None):
+        """
+        :param kind: Kind of the step, one of the PlayerTimeline constants
+        :param resolve: Called with the step and its timeline object to read everything the step needs
+        :param show: Called with the resolved step and the design to apply its visibility
+        :param details: Values every step of the handler starts with, shown in the step message
+        :param sweep: Called with a resolved step a seek skipped and the design to hide the entities the step created,
+            None if the step creates nothing the isolated view hides
+        """
+        self.kind = kind
+        self.resolve = resolve
+        self.show = show
+        self.details = details
+        self.sweep = sweep
+
+
+class StepHandlerRegistry:
+
+    def __init__(self):
+
+        # Handlers by object type, None for object types no handler matches
+        self.handlers = {}
+
+        # First handler registered for each kind
+        self.kinds = {}
+
+        # Tests matching an entity to a handler, tried in order for object types that are not in handlers yet
+        self.probes = []
+
+    def register(self, handler: StepHandler, object_type: str = None, probe=None):
+        """
+        Adds a handler
+        :param handler: The StepHandler
+        :param object_type: objectType of the entities it handles exactly, e.g. adsk::fusion::Sketch
+        :param probe: Called with an entity, returns True if the handler handles it, for families of object types
+        """
+        if object_type is not None:
+            self.handlers[object_type] = handler
+
+        if probe is not None:
+            self.probes.append((probe, handler))
+
+        self.kinds.setdefault(handler.kind, handler)
+
+    def for_entity(self, entity, object_type: str = None):
+        """
+        :param entity: A timeline entity
+        :param object_type: objectType of the entity if it was already read
+        :return: The handler of the entity or None if no handler matches
+        :rtype: StepHandler
+        """
+        if object_type is None:
+            object_type = entity.objectType
+
+        try:
+            return self.handlers[object_type]
+
+        except KeyError:
+            handler = None
+
+            for probe, candidate in self.probes:
+                if probe(entity):
+                    handler = candidate
+                    break
+
+            self.handlers[object_type] = handler
+            return handler
+
+    def for_kind(self, kind: str):
+        """
+        :param kind: Kind of a step
+        :return: The handler of the kind or None if the kind has none
+        :rtype: StepHandler
+        """
+        return self.kinds.get(kind, None)
@@ -0,0 +1,155 @@
+# Step messages shown in the player dialog
+#
+# The message of a step is rendered from templates built once when the module is loaded.  Health state names come
+# from a table built once from the health state enum.  Rendered messages are kept in a bounded cache keyed by timeline
+# index and health state, so stepping back and forth over the same steps never renders a message twice.
+#
+# Nothing in this module imports adsk, the health state enum is passed in by the player.
+
+from collections import OrderedDict
+
+from .PlayerTimeline import FEATURE, SKETCH, OCCURRENCE, CONSTRUCTION, JOINT, RIGID_GROUP
+
+# Rendered messages kept by a MessageCache
+MESSAGE_CACHE_SIZE = 256
+
+INDENT = "&nbsp;&nbsp;&nbsp;&nbsp;"
+
+
+# Template of one labelled value, key is the result key of the value
+def _row(label: str, key: str) -> str:
+    return "<b>" + INDENT + " " + label + ": &nbsp;&nbsp; </b>{" + key + "}<br />"
+
+
+HEADER_TEMPLATE = "<b>Feature Information</b><br />" \
+                  "<b>" + INDENT + " Name: &nbsp;&nbsp; </b>{name}<br />" \
+                  "<b>" + INDENT + " Type: &nbsp;&nbsp; &nbsp;</b>{type}<br />"
+
+HEALTH_TEMPLATE = "<b>" + INDENT + " Health: &nbsp; </b>{}<br />"
+
+# Values of each kind of step, features list their components below
+KIND_TEMPLATES = {
+    SKETCH: "<br /><b>Sketch Information</b><br />" + _row("Fully Constrained", "fully_constrained") +
+            _row("Parent Component", "parent_component") + _row("Sketch Plane", "plane") +
+            _row("Plane Type", "plane_type"),
+    OCCURRENCE: _row("Component", "parent_component"),
+    CONSTRUCTION: _row("Parent Component", "parent_component") + _row("Type", "construction_type"),
+    JOINT: _row("Parent Component", "parent_component") + _row("Reference 1", "part_1_name") +
+           _row("Reference 2", "part_2_name"),
+    RIGID_GROUP: _row("Parent Component", "parent_component") + _row("Occurrences", "occurrences")
+}
+
+COMPONENTS_HEADER = "<br /><b>Affected Components: </b>"
+COMPONENT_TEMPLATE = "<br /><b> " + INDENT + "{}</b><br />"
+BODIES_HEADER = INDENT + INDENT + "Affected Bodies:<br />"
+BODY_PREFIX = INDENT + INDENT + INDENT + " "
+BODY_SEPARATOR = "<br />" + BODY_PREFIX
+
+WARNING_TEMPLATE = "<br /><b>Error or Warning Message: </b><br />{}"
+
+
+def health_names(health_states, overrides: dict = None) -> dict:
+    """
+    Builds the name of every health state once
+    :param health_states: The health state enum, e.g. adsk.fusion.FeatureHealthStates
+    :param overrides: Names to show instead of the enum names, by health state
+    :return: Names by health state
+    :rtype: dict
+    """
+    names = {}
+
+    for name, value in vars(health_states).items():
+        if not name.startswith('_') and isinstance(value, int):
+            names.setdefault(value, name)
+
+    if overrides is not None:
+        names.update(overrides)
+
+    return names
+
+
+def render_message(result: dict, health_state_names: dict) -> str:
+    """
+    Renders the message of a step
+    :param result: Step values, see TimelineStep.to_result
+    :param health_state_names: Names by health state, see health_names
+    :return: The message as HTML
+    :rtype: str
+    """
+    parts = [HEADER_TEMPLATE.format_map(result)]
+
+    health_state = result.get("health_state", None)
+
+    if health_state is not None:
+        parts.append(HEALTH_TEMPLATE.format(health_state_names.get(health_state, str(health_state))))
+
+    kind = result.get("type", "")
+    template = KIND_TEMPLATES.get(kind, None)
+
+    if template is not None:
+        if kind == RIGID_GROUP:
+            result = dict(result, occurrences=", ".join(result["occurrence_names"]))
+
+        parts.append(template.format_map(result))
+
+    elif kind == FEATURE:
+        components = result.get("components", [])
+
+        if len(components) > 0:
+            parts.append(COMPONENTS_HEADER)
+
+            for component in components:
+                parts.append(COMPONENT_TEMPLATE.format(component["name"]))
+
+                bodies = component.get("bodies", [])
+
+                if len(bodies) > 0:
+                    parts.append(BODIES_HEADER)
+                    parts.append(BODY_PREFIX + BODY_SEPARATOR.join([body["name"] for body in bodies]) + "<br />")
+
+    warning = result.get("error_message", "")
+
+    if len(warning) > 0:
+        parts.append(WARNING_TEMPLATE.format(warning))
+
+    return "".join(parts)
+
+
+class MessageCache:
+
+    def __init__(self, render, size: int = MESSAGE_CACHE_SIZE):
+        """
+        :param render: Renders the message of a step result
+        :param size: Most messages kept, the least recently shown are dropped first
+        """
+        self.render = render
+        self.size = size
+
+        # Messages by timeline index, health state and warning, least recently shown first
+        self.messages = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, result: dict) -> str:
+        """
+        :param result: Step values, see TimelineStep.to_result
+        :return: The message of the step, rendered only if it is not cached
+        :rtype: str
+        """
+        key = (result["index"], result.get("health_state", None), result.get("error_message", ""))
+
+        message = self.messages.get(key, None)
+
+        if message is not None:
+            self.messages.move_to_end(key)
+            self.hits += 1
+            return message
+
+        self.misses += 1
+        message = self.messages[key] = self.render(result)
+
+        if len(self.messages) > self.size:
+            self.messages.popitem(last=False)
+
+        return message
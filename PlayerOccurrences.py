@@ -0,0 +1,52 @@
+# Occurrences of every component in the design
+#
+# Fusion finds the occurrences of a component by searching the whole assembly tree, the index below is built with one
+# pass over all occurrences and then answers from a dictionary.  It only holds the occurrences that exist at the
+# marker, so it has to be updated whenever the marker moves over a step that creates occurrences.
+
+
+class OccurrenceIndex:
+
+    def __init__(self):
+
+        # Occurrences by entity token, by the entity token of their component, None until built
+        self.components = None
+
+    @property
+    def is_built(self) -> bool:
+        return self.components is not None
+
+    def build(self, occurrences):
+        """
+        Indexes every occurrence in the design
+        :param occurrences: All occurrences at the marker, e.g. root_comp.allOccurrences
+        """
+        self.components = {}
+
+        for occurrence in occurrences:
+            self.add(occurrence)
+
+    def add(self, occurrence, component_token: str = None):
+        """
+        Adds an occurrence created after the index was built, ignored if the index is not built
+        :param occurrence: The new occurrence
+        :param component_token: Entity token of its component, read from the occurrence if not given
+        """
+        if self.components is None:
+            return
+
+        if component_token is None:
+            component_token = occurrence.component.entityToken
+
+        self.components.setdefault(component_token, {})[occurrence.entityToken] = occurrence
+
+    def get(self, component_token: str):
+        """
+        :param component_token: Entity token of a component
+        :return: The occurrences of the component
+        :rtype: list
+        """
+        return list(self.components.get(component_token, {}).values())
+
+    def invalidate(self):
+        self.components = None
@@ -0,0 +1,179 @@
+# History of profiled playbacks
+#
+# Each document gets one file of JSON lines, one line per profiling run, and runs are only ever appended.  Steps are
+# stored as plain rows to keep the lines short and are matched between runs by entity token, so a feature keeps its
+# history when steps are inserted before it in the timeline.
+
+import json
+import os
+import time
+
+from .PlayerProfiler import PHASES, MARKER
+
+# Column order of a stored step row
+COLUMNS = ('token', 'index', 'name', 'type') + PHASES
+
+
+class ProfileRun:
+
+    def __init__(self, document: str, version: int, created: float = None, steps: list = None):
+        self.document = document
+        self.version = version
+        self.created = time.time() if created is None else created
+
+        # One dict per step with the keys in COLUMNS
+        self.steps = [] if steps is None else steps
+
+    @classmethod
+    def from_profiler(cls, profiler, document: str, version: int):
+        """
+        Makes a run from the steps timed by a StepProfiler, steps without an entity token, e.g. groups, are left out
+        :param profiler: The StepProfiler of a playback
+        :param document: Id of the document played
+        :param version: Version of the document played
+        :rtype: ProfileRun
+        """
+        run = cls(document, version)
+
+        for timing in sorted(profiler.steps.values(), key=lambda this_timing: this_timing.index):
+            if not timing.token:
+                continue
+
+            step = {"token": timing.token, "index": timing.index, "name": timing.name, "type": timing.type}
+            step.update(timing.seconds)
+            run.steps.append(step)
+
+        return run
+
+    # Runs stored before groups were left out hold groups with an empty token, those never match
+    def by_token(self) -> dict:
+        return {step["token"]: step for step in self.steps if step["token"]}
+
+    def to_line(self) -> str:
+        run = {
+            "document": self.document,
+            "version": self.version,
+            "created": self.created,
+            "steps": [[step[column] for column in COLUMNS[:4]] + [round(step[phase], 6) for phase in PHASES]
+                      for step in self.steps]
+        }
+        return json.dumps(run, separators=(',', ':'))
+
+    @classmethod
+    def from_line(cls, line: str):
+        run = json.loads(line)
+        steps = [dict(zip(COLUMNS, row)) for row in run["steps"]]
+        return cls(run["document"], run["version"], run["created"], steps)
+
+
+class ProfileStore:
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def path(self, document: str) -> str:
+        file_name = ''.join(character if character.isalnum() or character in '-_.' else '_' for character in document)
+        return os.path.join(self.directory, file_name + '.jsonl')
+
+    def append(self, run: ProfileRun):
+        with open(self.path(run.document), 'a') as profile_file:
+            profile_file.write(run.to_line() + '\n')
+
+    def runs(self, document: str, version: int = None) -> list:
+        """
+        Reads the stored runs of a document, oldest first
+        :param document: Id of the document
+        :param version: Only return runs of this version
+        :rtype: list
+        """
+        path = self.path(document)
+
+        if not os.path.exists(path):
+            return []
+
+        runs = []
+
+        with open(path) as profile_file:
+            for line in profile_file:
+
+                # A run cut short by a crash leaves a partial last line
+                try:
+                    run = ProfileRun.from_line(line)
+                except (ValueError, KeyError):
+                    continue
+
+                if version is None or run.version == version:
+                    runs.append(run)
+
+        return runs
+
+    def latest(self, document: str, version: int = None):
+        runs = self.runs(document, version)
+
+        if runs:
+            return runs[-1]
+
+        return None
+
+
+def compare_runs(baseline: ProfileRun, current: ProfileRun, threshold: float = 1.5, minimum_time: float = .01,
+                 phase: str = MARKER) -> list:
+    """
+    Finds the steps that got slower between two runs, steps are matched by entity token
+    :param baseline: The earlier run
+    :param current: The run to check
+    :param threshold: Ratio of current to baseline time above which a step is flagged
+    :param minimum_time: Steps that take less than this in the current run are never flagged
+    :param phase: The phase to compare, by default the recompute time
+    :return: One dict per flagged step with its current values plus before, after and ratio, largest slowdown first
+    :rtype: list
+    """
+    baseline_steps = baseline.by_token()
+    regressions = []
+
+    for step in current.steps:
+        before_step = baseline_steps.get(step["token"], None)
+
+        if before_step is None:
+            continue
+
+        before = before_step[phase]
+        after = step[phase]
+
+        if after < minimum_time:
+            continue
+
+        if before > 0 and after / before <= threshold:
+            continue
+
+        regression = dict(step)
+        regression.update({"before": before, "after": after, "ratio": after / before if before > 0 else None})
+        regressions.append(regression)
+
+    regressions.sort(key=lambda regression: regression["after"] - regression["before"], reverse=True)
+
+    return regressions
+
+
+def comparison_message(baseline: ProfileRun, regressions: list) -> str:
+    message_string = 'Compared with version ' + str(baseline.version) + ' profiled '
+    message_string += time.strftime("%Y-%m-%d %H:%M", time.localtime(baseline.created)) + '\n'
+
+    if not regressions:
+        return message_string + 'No step got slower\n'
+
+    message_string += 'Slower Steps:\n'
+
+    for regression in regressions:
+        message_string += str(regression["index"] + 1) + ' ' + regression["name"] + ' (' + regression["type"] + ') '
+        message_string += "%0.6f" % regression["before"] + ' -> ' + "%0.6f" % regression["after"]
+
+        if regression["ratio"] is not None:
+            message_string += '  x' + "%0.1f" % regression["ratio"]
+
+        message_string += '\n'
+
+    return message_string
@@ -0,0 +1,119 @@
+# Per step timing of a playback
+#
+# Moving the marker over a step is what makes Fusion recompute it, so the time of the marker move is the recompute cost
+# of that step.  A seek first moves the marker up to the step, that move is not timed so it is never charged to the step.
+# The visibility and message work of the player are timed next to it so the three can be compared.
+
+import time
+from contextlib import contextmanager
+
+# Phases of a step in the order they run
+MARKER = 'marker'
+RESOLVE = 'resolve'
+VISIBILITY = 'visibility'
+MESSAGE = 'message'
+
+PHASES = (MARKER, RESOLVE, VISIBILITY, MESSAGE)
+
+
+class StepTiming:
+    __slots__ = ('index', 'name', 'type', 'token', 'seconds')
+
+    def __init__(self, index: int, name: str, step_type: str, token: str = None):
+        self.index = index
+        self.name = name
+        self.type = step_type
+        self.token = token
+
+        # Seconds spent in each phase the last time the step was played
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def to_result(self) -> dict:
+        result = {
+            "index": self.index,
+            "name": self.name,
+            "type": self.type,
+            "total": self.total
+        }
+        result.update(self.seconds)
+        return result
+
+
+class StepProfiler:
+
+    def __init__(self, is_enabled: bool = True):
+        self.is_enabled = is_enabled
+
+        # Timing of every step played, by timeline index
+        self.steps = {}
+
+    def begin(self, index: int, name: str, step_type: str, token: str = None):
+        """
+        Starts timing a step, timings from an earlier play of the same step are replaced
+        :param index: Timeline index of the step
+        :param name: Name of the timeline object
+        :param step_type: Type shown in the player message
+        :param token: Entity token of the step, used to match it between runs
+        """
+        if self.is_enabled:
+            self.steps[index] = StepTiming(index, name, step_type, token)
+
+    @contextmanager
+    def measure(self, index: int, phase: str):
+        """
+        Times the enclosed block as one phase of a step started with begin
+        :param index: Timeline index of the step
+        :param phase: One of PHASES
+        """
+        if not self.is_enabled or index not in self.steps:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[index].seconds[phase] += time.perf_counter() - start
+
+    def slowest(self, count: int = 10, phase: str = None) -> list:
+        """
+        Ranks the steps played by the time they took
+        :param count: Number of steps to return
+        :param phase: Rank by a single phase instead of the total
+        :return: StepTiming of the slowest steps, slowest first
+        :rtype: list
+        """
+        if phase is None:
+            key = lambda timing: timing.total
+        else:
+            key = lambda timing: timing.seconds[phase]
+
+        return sorted(self.steps.values(), key=key, reverse=True)[:count]
+
+    def report(self, count: int = 10) -> str:
+        """
+        Formats the slowest steps as text
+        :param count: Number of steps to list
+        :rtype: str
+        """
+        timings = self.steps.values()
+
+        message_string = 'Steps Profiled = ' + str(len(self.steps)) + '\n'
+
+        for phase in PHASES:
+            message_string += 'Total ' + phase + ' = ' + "%0.6f" % sum(timing.seconds[phase] for timing in timings)
+            message_string += '\n'
+
+        message_string += '\nSlowest Steps:\n'
+
+        for timing in self.slowest(count):
+            message_string += str(timing.index + 1) + ' ' + timing.name + ' (' + timing.type + ') = '
+            message_string += "%0.6f" % timing.total
+            message_string += '  [' + ', '.join(phase + ' ' + "%0.6f" % timing.seconds[phase] for phase in PHASES)
+            message_string += ']\n'
+
+        return message_string
@@ -0,0 +1,190 @@
+# Queries selecting the timeline steps to play
+#
+# A query is a list of terms such as  type:sketch  component:Bracket  name:fillet*  joined by spaces.  Terms on the
+# same field match any of their patterns, terms on different fields must all match, and a term without a field is a
+# name pattern.  Patterns are shell style wildcards and ignore case.
+#
+# The query runs against indexes of the step types, component names and step names built once per session, so the
+# wildcards are only tested against the distinct names, never against every timeline step.
+#
+# Nothing in this module imports adsk.
+
+import bisect
+import fnmatch
+import shlex
+from collections import defaultdict
+
+from .PlayerTimeline import TimelineStep, FEATURE, SKETCH, OCCURRENCE, CONSTRUCTION, JOINT, RIGID_GROUP, GROUP
+
+TYPE = 'type'
+COMPONENT = 'component'
+NAME = 'name'
+
+# Step kinds by the names used in type terms
+TYPE_NAMES = {
+    'feature': FEATURE,
+    'sketch': SKETCH,
+    'occurrence': OCCURRENCE,
+    'component': OCCURRENCE,
+    'construction': CONSTRUCTION,
+    'joint': JOINT,
+    'rigidgroup': RIGID_GROUP,
+    'group': GROUP
+}
+
+
+class StepQuery:
+
+    def __init__(self, text: str):
+        """
+        :param text: The query, e.g. type:feature component:Bracket*
+        """
+        self.text = text.strip()
+
+        # Lower case patterns by field
+        self.terms = defaultdict(list)
+
+        try:
+            words = shlex.split(self.text)
+        except ValueError:
+            words = self.text.split()
+
+        for word in words:
+            field, separator, pattern = word.partition(':')
+            field = field.lower()
+
+            if not separator or field not in (TYPE, COMPONENT, NAME):
+                field, pattern = NAME, word
+
+            if pattern:
+                self.terms[field].append(pattern.lower())
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def kinds(self) -> set:
+        """
+        :return: The step kinds matched by the type terms
+        :rtype: set
+        """
+        return {TYPE_NAMES[name] for pattern in self.terms[TYPE] for name in fnmatch.filter(TYPE_NAMES, pattern)}
+
+    def matches(self, step: TimelineStep) -> bool:
+        """
+        Tests one step, only needed for steps whose component was not known when the query ran
+        :param step: A resolved step
+        :rtype: bool
+        """
+        if self.terms[TYPE] and step.kind not in self.kinds():
+            return False
+
+        for field, value in ((COMPONENT, step.component), (NAME, step.name)):
+            patterns = self.terms[field]
+
+            if patterns and not any(fnmatch.fnmatchcase(value.lower(), pattern) for pattern in patterns):
+                return False
+
+        return True
+
+
+class QueryIndex:
+
+    def __init__(self, steps=()):
+
+        # Timeline indexes by step kind, by lower case component name and by lower case step name
+        self.kinds = defaultdict(list)
+        self.components = defaultdict(list)
+        self.names = defaultdict(list)
+
+        # Steps beyond the marker when playback started, their component is only known once they are played
+        self.unresolved = set()
+
+        for step in steps:
+            self.add(step)
+
+    def add(self, step: TimelineStep):
+        self.kinds[step.kind].append(step.index)
+        self.names[step.name.lower()].append(step.index)
+
+        if step.is_resolved:
+            self.components[step.component.lower()].append(step.index)
+        else:
+            self.unresolved.add(step.index)
+
+    def resolve(self, step: TimelineStep):
+        """
+        Adds the component of a step resolved after the index was built
+        :param step: The resolved step
+        """
+        if step.index in self.unresolved:
+            self.unresolved.discard(step.index)
+            self.components[step.component.lower()].append(step.index)
+
+    def select(self, query: StepQuery) -> list:
+        """
+        :param query: The query
+        :return: Timeline indexes of the steps that may match, in order
+        :rtype: list
+        """
+        selected = None
+
+        for field in (TYPE, COMPONENT, NAME):
+            patterns = query.terms[field]
+
+            if not patterns:
+                continue
+
+            if field == TYPE:
+                indexes = set(index for kind in query.kinds() for index in self.kinds.get(kind, ()))
+
+            else:
+                table = self.components if field == COMPONENT else self.names
+                indexes = set(index for pattern in patterns for name in fnmatch.filter(table, pattern)
+                              for index in table[name])
+
+                # A step with an unknown component may still match, it is tested when it is played
+                if field == COMPONENT:
+                    indexes.update(self.unresolved)
+
+            selected = indexes if selected is None else selected & indexes
+
+        return sorted(selected) if selected is not None else []
+
+
+class FilteredSequence:
+
+    def __init__(self, query: StepQuery, indexes: list):
+        self.query = query
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def next_after(self, index: int):
+        """
+        :param index: Timeline index of a step
+        :return: Timeline index of the first match after the step or None if there is none
+        """
+        position = bisect.bisect_right(self.indexes, index)
+        return self.indexes[position] if position < len(self.indexes) else None
+
+    def last_before(self, index: int):
+        """
+        :param index: Timeline index of a step
+        :return: Timeline index of the last match before the step or None if there is none
+        """
+        position = bisect.bisect_left(self.indexes, index)
+        return self.indexes[position - 1] if position > 0 else None
+
+    def position(self, index: int):
+        """
+        :param index: Timeline index of a step
+        :return: Position of the step in the sequence or None if it does not match
+        """
+        position = bisect.bisect_left(self.indexes, index)
+        return position if position < len(self.indexes) and self.indexes[position] == index else None
+
+    def discard(self, index: int):
+        position = self.position(index)
+        if position is not None:
+            del self.indexes[position]
@@ -0,0 +1,198 @@
+# Precomputed timeline index for playback
+#
+# The index is built once when playback starts and holds one compact record per timeline step so that stepping is
+# a lookup instead of a series of casts and collection walks.
+#
+# Nothing in this module imports adsk, records only hold plain values and entity tokens.
+
+import bisect
+
+FEATURE = 'Feature'
+SKETCH = 'Sketch'
+OCCURRENCE = 'Make Component'
+CONSTRUCTION = 'Construction Geometry'
+JOINT = 'Joint'
+RIGID_GROUP = 'Rigid Group'
+GROUP = 'group'
+
+# Keys of a step result that are not kind specific details
+RESULT_KEYS = ('index', 'name', 'type', 'token', 'health_state', 'error_message', 'parent_component', 'health')
+
+
+class TimelineStep:
+    __slots__ = ('index', 'kind', 'name', 'token', 'component', 'component_tokens', 'body_tokens', 'health',
+                 'message', 'details', 'is_resolved')
+
+    def __init__(self, index: int, kind: str, name: str = '', token: str = ''):
+        self.index = index
+        self.kind = kind
+        self.name = name
+        self.token = token
+
+        # Name of the parent component and tokens of every component the step affects, parent first
+        self.component = ''
+        self.component_tokens = ()
+
+        # Tokens of the bodies the step affects
+        self.body_tokens = ()
+
+        # Health state and error or warning message, None for steps without a health state
+        self.health = None
+        self.message = ''
+
+        # Kind specific values shown in the step message
+        self.details = None
+
+        # Steps beyond the marker when the index was built are resolved when they are played
+        self.is_resolved = False
+
+    @classmethod
+    def from_record(cls, record: dict):
+        """
+        Rebuilds a resolved step from its result, e.g. a line written by the timeline export
+        :param record: Step values as returned by to_result
+        :rtype: TimelineStep
+        """
+        step = cls(record["index"], record["type"], record.get("name", ''), record.get("token", ''))
+
+        step.health = record.get("health_state", None)
+        step.message = record.get("error_message", '')
+        step.component = record.get("parent_component", '')
+
+        details = {key: value for key, value in record.items() if key not in RESULT_KEYS}
+
+        if details:
+            step.details = details
+
+            components = details.get("components", ())
+            step.component_tokens = tuple(component["token"] for component in components)
+            step.body_tokens = tuple(body["token"] for component in components for body in component["bodies"])
+
+        step.is_resolved = True
+        return step
+
+    def to_result(self) -> dict:
+        """
+        Builds the result dictionary used to create the step message
+        :return: Step values keyed the way make_message expects them
+        :rtype: dict
+        """
+        result = {
+            "index": self.index,
+            "name": self.name,
+            "type": self.kind,
+            "token": self.token
+        }
+
+        if self.health is not None:
+            result["health_state"] = self.health
+            result["error_message"] = self.message
+
+        if self.component:
+            result["parent_component"] = self.component
+
+        if self.details is not None:
+            result.update(self.details)
+
+        return result
+
+
+class TimelineIndex:
+
+    def __init__(self):
+        self.steps = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return (step for step in self.steps if step is not None)
+
+    def get(self, index: int):
+        if 0 <= index < len(self.steps):
+            return self.steps[index]
+        return None
+
+    def add(self, step: TimelineStep):
+        if step.index >= len(self.steps):
+            self.steps.extend([None] * (step.index + 1 - len(self.steps)))
+        self.steps[step.index] = step
+
+
+# Joint tokens in timeline order, the joints that exist at a marker are a prefix found by binary search
+class JointTable:
+
+    def __init__(self, steps=()):
+        self.indexes = []
+        self.tokens = []
+
+        for step in steps:
+            self.add(step)
+
+    def add(self, step: TimelineStep):
+        if step.kind != JOINT:
+            return
+
+        position = bisect.bisect_left(self.indexes, step.index)
+
+        if position < len(self.indexes) and self.indexes[position] == step.index:
+            self.tokens[position] = step.token
+            return
+
+        self.indexes.insert(position, step.index)
+        self.tokens.insert(position, step.token)
+
+    def before(self, marker: int):
+        """
+        :param marker: The marker position
+        :return: Tokens of the joints created by the steps before the marker
+        :rtype: list
+        """
+        return self.tokens[:bisect.bisect_left(self.indexes, marker)]
+
+
+# Timeline positions of the steps with an error or warning, in order, the problem after or before a step is found by
+# binary search
+class HealthIndex:
+
+    def __init__(self, healthy):
+        """
+        :param healthy: The health state of a step without problems
+        """
+        self.healthy = healthy
+        self.indexes = []
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def update(self, index: int, health):
+        """
+        Adds or removes a step after its health state was read
+        :param index: Timeline index of the step
+        :param health: Health state of the step, None for steps without one
+        """
+        position = bisect.bisect_left(self.indexes, index)
+        is_indexed = position < len(self.indexes) and self.indexes[position] == index
+        is_problem = health is not None and health != self.healthy
+
+        if is_problem and not is_indexed:
+            self.indexes.insert(position, index)
+
+        elif is_indexed and not is_problem:
+            del self.indexes[position]
+
+    def next_after(self, index: int):
+        """
+        :param index: Timeline index of a step
+        :return: Timeline index of the first problem after the step or None if there is none
+        """
+        position = bisect.bisect_right(self.indexes, index)
+        return self.indexes[position] if position < len(self.indexes) else None
+
+    def last_before(self, index: int):
+        """
+        :param index: Timeline index of a step
+        :return: Timeline index of the last problem before the step or None if there is none
+        """
+        position = bisect.bisect_left(self.indexes, index)
+        return self.indexes[position - 1] if position > 0 else None
@@ -0,0 +1,194 @@
+# Recording of the Fusion API calls made by the player
+#
+# While recording, the AppObjects the player works from are wrapped in proxies that forward every property read,
+# property write, method call, iteration and cast to the real object and log it with its duration.  Objects returned
+# by the API are wrapped in turn and numbered in the order they are handed out, so a trace holds the complete call
+# pattern of a playback and can be replayed against stand-in objects without the design or Fusion.
+#
+# The player actions (step, seek, end) are logged as well so a replay can drive the player the same way.
+
+import json
+import time
+
+TRACE_VERSION = 1
+
+# Operations logged in a trace entry
+ROOT = 'o'
+READ = 'r'
+WRITE = 'w'
+CALL = 'c'
+ITERATE = 'i'
+LENGTH = 'n'
+CAST = 'k'
+ACTION = 'a'
+
+PRIMITIVES = (type(None), bool, int, float, str)
+
+
+class TraceRecorder:
+
+    def __init__(self, options: dict = None):
+
+        # Player settings needed to replay the trace
+        self.options = {} if options is None else options
+
+        # One list per operation: object id, operation, name, arguments, result, microseconds
+        self.entries = []
+
+        self.object_count = 0
+
+    def root(self, target):
+        """
+        Wraps an AppObjects instance, every object the player reads from it is traced
+        :param target: The AppObjects instance
+        :rtype: TracedObject
+        """
+        traced = self._wrap(target)
+        self.entries.append([traced._id, ROOT, '', None, None, 0])
+        return traced
+
+    def action(self, name: str, *args):
+        self.entries.append([None, ACTION, name, list(args), None, 0])
+
+    def call(self, object_id: int, operation: str, name: str, function, args=()):
+        """
+        Runs one operation on a real object and logs it, objects it returns are wrapped
+        :param object_id: Id of the traced object the operation is on
+        :param operation: One of the operation constants
+        :param name: Property, method or cast type name
+        :param function: Performs the operation on the real objects
+        :param args: Arguments to pass to function, traced objects are unwrapped
+        :return: The result of the operation with objects wrapped
+        """
+        real_args = [arg._target if isinstance(arg, TracedObject) else arg for arg in args]
+        encoded_args = [self._encode_argument(arg) for arg in args]
+
+        start = time.perf_counter()
+
+        try:
+            value = function(*real_args)
+
+        except Exception as error:
+            result = {"e": str(error), "x": type(error).__name__}
+            self._log(object_id, operation, name, encoded_args, result, start)
+            raise
+
+        traced, encoded = self._trace_value(value)
+        self._log(object_id, operation, name, encoded_args, encoded, start)
+
+        return traced
+
+    def read(self, traced, name: str):
+        """
+        Reads an attribute of a traced object, methods are returned unread and logged when they are called
+        :param traced: The TracedObject
+        :param name: Name of the attribute
+        """
+        start = time.perf_counter()
+
+        try:
+            value = getattr(traced._target, name)
+
+        except Exception as error:
+            self._log(traced._id, READ, name, [], {"e": str(error), "x": type(error).__name__}, start)
+            raise
+
+        if callable(value):
+            return TracedMethod(traced, name, value)
+
+        traced_value, encoded = self._trace_value(value)
+        self._log(traced._id, READ, name, [], encoded, start)
+
+        return traced_value
+
+    def save(self, path: str):
+        header = {"version": TRACE_VERSION, "options": self.options, "objects": self.object_count,
+                  "entries": len(self.entries)}
+
+        with open(path, 'w') as trace_file:
+            trace_file.write(json.dumps(header) + '\n')
+
+            for entry in self.entries:
+                trace_file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+
+    def _log(self, object_id, operation, name, args, result, start):
+        microseconds = int((time.perf_counter() - start) * 1e6)
+        self.entries.append([object_id, operation, name, args, result, microseconds])
+
+    def _wrap(self, target):
+        traced = TracedObject(self, self.object_count, target)
+        self.object_count += 1
+        return traced
+
+    def _trace_value(self, value):
+        if isinstance(value, PRIMITIVES):
+            return value, value
+
+        if isinstance(value, (list, tuple)):
+            pairs = [self._trace_value(item) for item in value]
+            return [pair[0] for pair in pairs], {"l": [pair[1] for pair in pairs]}
+
+        traced = self._wrap(value)
+        return traced, {"o": traced._id}
+
+    def _encode_argument(self, arg):
+        if isinstance(arg, TracedObject):
+            return {"o": arg._id}
+
+        if isinstance(arg, PRIMITIVES):
+            return arg
+
+        return repr(arg)
+
+
+class TracedObject:
+    __slots__ = ('_recorder', '_id', '_target')
+
+    def __init__(self, recorder: TraceRecorder, object_id: int, target):
+        object.__setattr__(self, '_recorder', recorder)
+        object.__setattr__(self, '_id', object_id)
+        object.__setattr__(self, '_target', target)
+
+    def __getattr__(self, name):
+        return self._recorder.read(self, name)
+
+    def __setattr__(self, name, value):
+        target = self._target
+        self._recorder.call(self._id, WRITE, name, lambda this_value: setattr(target, name, this_value), (value,))
+
+    def __iter__(self):
+        target = self._target
+        return iter(self._recorder.call(self._id, ITERATE, '', lambda: list(target)))
+
+    def __len__(self):
+        target = self._target
+        return self._recorder.call(self._id, LENGTH, '', lambda: len(target))
+
+    def __bool__(self):
+        return True
+
+
+class TracedMethod:
+    __slots__ = ('traced', 'name', 'method')
+
+    def __init__(self, traced: TracedObject, name: str, method):
+        self.traced = traced
+        self.name = name
+        self.method = method
+
+    def __call__(self, *args):
+        return self.traced._recorder.call(self.traced._id, CALL, self.name, self.method, args)
+
+
+def cast(cls, value):
+    """
+    Casts a Fusion object to an API type, traced objects are cast through their recorder
+    :param cls: The API type, e.g. adsk.fusion.Feature
+    :param value: The object to cast
+    :return: The cast object or None
+    """
+    if isinstance(value, TracedObject):
+        target = value._target
+        return value._recorder.call(value._id, CAST, cls.classType(), lambda: cls.cast(target))
+
+    return cls.cast(value)
@@ -0,0 +1,178 @@
+# Differential visibility for timeline playback
+#
+# The original player isolated every step by sweeping the whole design and writing a light bulb on every entity.
+# The engine below remembers the value it last wrote (or read) for each light bulb, keyed by entity token, so that
+# a step only writes the entities whose state differs from what that step needs.
+#
+# Within a step writes are only staged.  The same pair written twice keeps the last value and a pair hidden then shown
+# again ends up at the value it already has, so flush applies only the net changes of the step, in the order the pairs
+# were first staged.
+
+
+def entity_key(entity, prop: str = 'isLightBulbOn'):
+    return entity.entityToken, prop
+
+
+class VisibilityEngine:
+
+    def __init__(self):
+
+        # Live entity for every token the engine has seen
+        self.entities = {}
+
+        # Last known value of every (token, property) pair
+        self.state = {}
+
+        # Value a (token, property) pair takes in the isolated view, written back when a step no longer shows it
+        self.baseline = {}
+
+        # Pairs the current step has changed away from their baseline
+        self.shown = {}
+
+        # Pairs written since playback started, the only ones that need restoring when it ends
+        self.dirty = set()
+
+        # Writes staged by the current step, applied by flush
+        self.pending = {}
+
+        # Called with the entity and property before a pair is first written, used to save the original state
+        self.capture = None
+
+        self.is_swept = False
+
+        # API write counters, staged writes that needed no API write are counted as coalesced
+        self.step_writes = 0
+        self.total_writes = 0
+        self.total_coalesced = 0
+        self.write_counts = []
+
+    def sweep(self, entity, prop: str, value: bool, token: str = None):
+        """
+        Registers an entity with its isolated value during the initial full sweep.
+        The current value is read once and the isolated value is staged, it is only written if it differs.
+        :param entity: Any Fusion entity with an entityToken
+        :param prop: Name of the light bulb property
+        :param value: The value of the property in the isolated view
+        :param token: The entity token if it is already known
+        """
+        key = entity_key(entity, prop) if token is None else (token, prop)
+        self.entities[key[0]] = entity
+        self.baseline[key] = value
+
+        if key not in self.state:
+            self.state[key] = getattr(entity, prop)
+
+        self.pending[key] = value
+
+    def begin_step(self):
+        """
+        Starts a new step by staging everything the previous step showed back to its isolated value.
+        """
+        self.write_counts.append(0)
+        self.step_writes = 0
+
+        previous = self.shown
+        self.shown = {}
+
+        for key in previous:
+            value = self.baseline.get(key, None)
+            if value is not None:
+                self.pending[key] = value
+
+    def show(self, entity, prop: str = 'isLightBulbOn', value: bool = True, baseline: bool = None):
+        """
+        Stages a property value for the current step, flush only writes it if the known value differs.
+        :param entity: Any Fusion entity with an entityToken
+        :param prop: Name of the property to set
+        :param value: The value the current step needs
+        :param baseline: Isolated value of an entity not seen during the sweep, None leaves it as set after the step
+        """
+        key = entity_key(entity, prop)
+        self.entities[key[0]] = entity
+
+        if baseline is not None:
+            self.baseline.setdefault(key, baseline)
+
+        if self.baseline.get(key, None) != value:
+            self.shown[key] = value
+
+        self.pending[key] = value
+
+    def flush(self):
+        """
+        Applies the net writes staged by the current step
+        """
+        pending = self.pending
+        self.pending = {}
+
+        for key, value in pending.items():
+            if self.state.get(key, None) == value:
+                self.total_coalesced += 1
+                continue
+
+            # Entities rolled back by a backward seek can not be changed, they keep their known state
+            try:
+                self._write(key, value)
+
+            except RuntimeError:
+                if self.entities[key[0]].isValid:
+                    raise
+
+    def restore(self, saved_value, find_entity, tokens=None):
+        """
+        Writes the saved value back to every pair playback changed, skipping pairs already back at their saved value.
+        Pairs of entities that no longer exist stay dirty, restore them again once the entities are rolled forward.
+        :param saved_value: Function returning the saved value for a token and property or None if it was not saved
+        :param find_entity: Function returning the live entity for a token or None if it no longer exists
+        :param tokens: Only restore the pairs of these entities, e.g. the entities a backward seek is about to roll back
+        """
+
+        # Writes staged but never flushed did not change anything
+        self.pending.clear()
+
+        unrestored = set()
+
+        for key in self.dirty:
+            if tokens is not None and key[0] not in tokens:
+                unrestored.add(key)
+                continue
+
+            value = saved_value(*key)
+
+            if value is None or self.state.get(key, None) == value:
+                continue
+
+            try:
+                self._write(key, value)
+
+            # Entities go stale when the timeline recomputes them
+            except RuntimeError:
+                entity = find_entity(key[0])
+
+                if entity is None:
+                    unrestored.add(key)
+                    continue
+
+                self.entities[key[0]] = entity
+                self._write(key, value)
+
+        self.dirty = unrestored
+
+    def _write(self, key, value):
+        if self.state.get(key, None) == value:
+            return
+
+        entity = self.entities[key[0]]
+
+        if key not in self.dirty:
+            if self.capture is not None:
+                self.capture(entity, key[1])
+            self.dirty.add(key)
+
+        setattr(entity, key[1], value)
+        self.state[key] = value
+
+        self.step_writes += 1
+        self.total_writes += 1
+        if self.write_counts:
+            self.write_counts[-1] += 1
@@ -0,0 +1,921 @@
+# Pure-Python stand-in for the parts of adsk.core / adsk.fusion used by the player
+#
+# Every property read and write on an API object is counted in STATS so that the number of Fusion API calls a
+# piece of player code makes can be measured without Fusion.  Entities created by a timeline step only exist while
+# the marker is past that step, like in Fusion, and writing to an entity that does not exist raises RuntimeError.
+#
+# This is only for benchmarks, it is never imported by the add-in.
+
+import sys
+import types
+
+
+class ApiStats:
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.calls = 0
+
+    def reset(self):
+        self.reads = 0
+        self.writes = 0
+        self.calls = 0
+
+    @property
+    def total(self):
+        return self.reads + self.writes + self.calls
+
+    def as_dict(self):
+        return {'reads': self.reads, 'writes': self.writes, 'calls': self.calls}
+
+
+STATS = ApiStats()
+
+
+def api_property(name, writable=False):
+    private = '_' + name
+
+    def getter(self):
+        STATS.reads += 1
+        return getattr(self, private)
+
+    def setter(self, value):
+        STATS.writes += 1
+        if isinstance(self, Entity) and not self.exists():
+            raise RuntimeError('3 : object is rolled back')
+        setattr(self, private, value)
+
+    return property(getter, setter if writable else None)
+
+
+def api_method(function):
+    def wrapper(*args, **kwargs):
+        STATS.calls += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+# adsk.core
+class Base:
+    objectType = 'adsk::core::Base'
+
+    @classmethod
+    def cast(cls, obj):
+
+        # Objects replayed from a trace answer casts with the recorded result
+        replay_cast = getattr(obj, 'replay_cast', None)
+        if replay_cast is not None:
+            return replay_cast(cls.objectType)
+
+        STATS.calls += 1
+        if isinstance(obj, cls):
+            return obj
+        return None
+
+    @classmethod
+    def classType(cls):
+        return cls.objectType
+
+    @property
+    def isValid(self):
+        STATS.reads += 1
+        return True
+
+
+class ObjectCollection(Base):
+    objectType = 'adsk::core::ObjectCollection'
+
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    @property
+    def count(self):
+        STATS.reads += 1
+        return len(self._items)
+
+    def item(self, index):
+        STATS.calls += 1
+        return self._items[index]
+
+    def __iter__(self):
+        STATS.reads += 1
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+
+class Event:
+
+    def __init__(self):
+        self.handlers = []
+
+    def add(self, handler):
+        self.handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+            return True
+        return False
+
+
+class EventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandEventHandler(EventHandler):
+    pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    pass
+
+
+class InputChangedEventHandler(EventHandler):
+    pass
+
+
+class HTMLEventHandler(EventHandler):
+    pass
+
+
+class UserInterfaceGeneralEventHandler(EventHandler):
+    pass
+
+
+class DocumentEventHandler(EventHandler):
+    pass
+
+
+class WorkspaceEventHandler(EventHandler):
+    pass
+
+
+class CustomEventHandler(EventHandler):
+    pass
+
+
+class CommandInput(Base):
+    objectType = 'adsk::core::CommandInput'
+
+    def __init__(self, input_id, name='', value=None):
+        self.id = input_id
+        self.name = name
+        self.value = value
+        self.text = value if isinstance(value, str) else ''
+        self.formattedText = self.text
+        self.isVisible = True
+        self.isEnabled = True
+        self.tooltip = ''
+        self.minimumValue = 0
+        self.maximumValue = 0
+        self.listItems = ObjectCollection()
+        self.selectedItem = None
+
+
+def _input_class(name):
+    return type(name, (CommandInput,), {'objectType': 'adsk::core::' + name})
+
+
+BoolValueCommandInput = _input_class('BoolValueCommandInput')
+DistanceValueCommandInput = _input_class('DistanceValueCommandInput')
+FloatSliderCommandInput = _input_class('FloatSliderCommandInput')
+FloatSpinnerCommandInput = _input_class('FloatSpinnerCommandInput')
+IntegerSliderCommandInput = _input_class('IntegerSliderCommandInput')
+IntegerSpinnerCommandInput = _input_class('IntegerSpinnerCommandInput')
+ValueCommandInput = _input_class('ValueCommandInput')
+SliderCommandInput = _input_class('SliderCommandInput')
+StringValueCommandInput = _input_class('StringValueCommandInput')
+ButtonRowCommandInput = _input_class('ButtonRowCommandInput')
+DropDownCommandInput = _input_class('DropDownCommandInput')
+RadioButtonGroupCommandInput = _input_class('RadioButtonGroupCommandInput')
+SelectionCommandInput = _input_class('SelectionCommandInput')
+TextBoxCommandInput = _input_class('TextBoxCommandInput')
+
+
+class CommandInputs(Base):
+    objectType = 'adsk::core::CommandInputs'
+
+    def __init__(self):
+        self._inputs = []
+
+    def _add(self, command_input):
+        self._inputs.append(command_input)
+        return command_input
+
+    def addTextBoxCommandInput(self, input_id, name, text, rows, is_read_only):
+        return self._add(TextBoxCommandInput(input_id, name, text))
+
+    def addBoolValueInput(self, input_id, name, is_check_box, resource_folder='', initial_value=False):
+        return self._add(BoolValueCommandInput(input_id, name, initial_value))
+
+    def addIntegerSpinnerCommandInput(self, input_id, name, minimum, maximum, step, initial_value):
+        command_input = IntegerSpinnerCommandInput(input_id, name, initial_value)
+        command_input.minimumValue = minimum
+        command_input.maximumValue = maximum
+        return self._add(command_input)
+
+    def addFloatSpinnerCommandInput(self, input_id, name, unit_type, minimum, maximum, step, initial_value):
+        command_input = FloatSpinnerCommandInput(input_id, name, initial_value)
+        command_input.minimumValue = minimum
+        command_input.maximumValue = maximum
+        return self._add(command_input)
+
+    def addIntegerSliderCommandInput(self, input_id, name, minimum, maximum, has_two_sliders=False):
+        command_input = IntegerSliderCommandInput(input_id, name, minimum)
+        command_input.valueOne = minimum
+        command_input.minimumValue = minimum
+        command_input.maximumValue = maximum
+        return self._add(command_input)
+
+    def addStringValueInput(self, input_id, name, initial_value=''):
+        return self._add(StringValueCommandInput(input_id, name, initial_value))
+
+    def addButtonRowCommandInput(self, input_id, name, is_multi_select):
+        return self._add(ButtonRowCommandInput(input_id, name))
+
+    def addValueInput(self, input_id, name, units, initial_value):
+        return self._add(ValueCommandInput(input_id, name, initial_value))
+
+    def itemById(self, input_id):
+        for command_input in self._inputs:
+            if command_input.id == input_id:
+                return command_input
+        return None
+
+    def __iter__(self):
+        return iter(self._inputs)
+
+
+class Command(Base):
+    objectType = 'adsk::core::Command'
+
+    def __init__(self, definition):
+        self.parentCommandDefinition = definition
+        self.commandInputs = CommandInputs()
+        self.execute = Event()
+        self.inputChanged = Event()
+        self.destroy = Event()
+        self.executePreview = Event()
+        self.okButtonText = 'OK'
+        self.cancelButtonText = 'Cancel'
+        self.isOKButtonVisible = True
+        self.isAutoExecute = False
+        self.doExecute = None
+
+
+class CommandDefinition(Base):
+    objectType = 'adsk::core::CommandDefinition'
+
+    def __init__(self, cmd_id, name='', tooltip='', resources=''):
+        self.id = cmd_id
+        self.name = name
+        self.commandCreated = Event()
+        self.controlDefinition = types.SimpleNamespace(isEnabled=True)
+        self.execute_count = 0
+
+    def execute(self, inputs=None):
+        self.execute_count += 1
+        return True
+
+    def deleteMe(self):
+        return True
+
+
+class CommandDefinitions(Base):
+
+    def __init__(self):
+        self._definitions = {}
+
+    def itemById(self, cmd_id):
+        return self._definitions.get(cmd_id, None)
+
+    def addButtonDefinition(self, cmd_id, name, tooltip='', resources=''):
+        definition = CommandDefinition(cmd_id, name, tooltip, resources)
+        self._definitions[cmd_id] = definition
+        return definition
+
+
+class UserInterface(Base):
+    objectType = 'adsk::core::UserInterface'
+
+    def __init__(self):
+        self.commandDefinitions = CommandDefinitions()
+        self.messages = []
+        self.palettes = types.SimpleNamespace(itemById=lambda palette_id: None)
+        self.workspaceActivated = Event()
+
+    def messageBox(self, text, title='', *args):
+        self.messages.append(text)
+        return 0
+
+
+class CustomEvent(Event):
+    pass
+
+
+class Application(Base):
+    objectType = 'adsk::core::Application'
+    _instance = None
+
+    def __init__(self):
+        self.userInterface = UserInterface()
+        self.importManager = None
+        self.activeDocument = None
+        self.documentActivated = Event()
+        self.custom_events = {}
+        self.fired_events = []
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @property
+    def activeProduct(self):
+        if self.activeDocument is None:
+            return None
+        return self.activeDocument.design
+
+    def registerCustomEvent(self, event_id):
+        event = CustomEvent()
+        self.custom_events[event_id] = event
+        return event
+
+    def unregisterCustomEvent(self, event_id):
+        return self.custom_events.pop(event_id, None) is not None
+
+    def fireCustomEvent(self, event_id, additional_info=''):
+        self.fired_events.append((event_id, additional_info))
+        return True
+
+
+class CommandTerminationReason:
+    UnknownTerminationReason = 0
+    CompletedTerminationReason = 1
+    CancelledTerminationReason = 2
+    AbortedTerminationReason = 3
+    PreEmptedTerminationReason = 4
+    SessionEndingTerminationReason = 5
+
+
+class DropDownStyles:
+    CheckBoxDropDownStyle = 0
+    LabeledIconDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class PaletteDockingStates:
+    PaletteDockStateFloating = 0
+    PaletteDockStateRight = 3
+
+
+# adsk.fusion
+class FeatureHealthStates:
+    HealthyFeatureHealthState = 0
+    WarningFeatureHealthState = 1
+    ErrorFeatureHealthState = 2
+    SuppressedFeatureHealthState = 3
+    RolledBackFeatureHealthState = 4
+    UnknownFeatureHealthState = 5
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class Entity(Base):
+    objectType = 'adsk::fusion::Entity'
+
+    def __init__(self, design, name, created_at=None):
+        self._design = design
+        self._name = name
+        self._created_at = created_at
+        self._entityToken = design.new_token(self)
+
+    name = api_property('name', True)
+    entityToken = api_property('entityToken')
+
+    def exists(self):
+        return self._created_at is None or self._created_at < self._design._timeline._markerPosition
+
+    @property
+    def isValid(self):
+        STATS.reads += 1
+        return self.exists()
+
+
+class LightBulbEntity(Entity):
+
+    def __init__(self, design, name, created_at=None, light_bulb=True):
+        super().__init__(design, name, created_at)
+        self._isLightBulbOn = light_bulb
+
+    isLightBulbOn = api_property('isLightBulbOn', True)
+
+
+class HealthMixin:
+    _healthState = FeatureHealthStates.HealthyFeatureHealthState
+    _errorOrWarningMessage = ''
+
+    healthState = api_property('healthState')
+    errorOrWarningMessage = api_property('errorOrWarningMessage')
+
+    @property
+    def timelineObject(self):
+        STATS.reads += 1
+        return self._timelineObject
+
+
+class BRepFace(Entity):
+    objectType = 'adsk::fusion::BRepFace'
+
+    def __init__(self, design, body, temp_id):
+        super().__init__(design, 'Face' + str(temp_id), body._created_at)
+        self._body = body
+        self._tempId = temp_id
+
+    body = api_property('body')
+    tempId = api_property('tempId')
+
+
+class BRepBody(LightBulbEntity):
+    objectType = 'adsk::fusion::BRepBody'
+
+    def __init__(self, design, name, component, created_at=None):
+        super().__init__(design, name, created_at)
+        self._parentComponent = component
+        self.faces = ObjectCollection([BRepFace(design, self, design.next_temp_id())])
+
+    parentComponent = api_property('parentComponent')
+
+    @property
+    def isVisible(self):
+        STATS.reads += 1
+        return self._isLightBulbOn and self._parentComponent._isBodiesFolderLightBulbOn
+
+
+class Sketch(LightBulbEntity, HealthMixin):
+    objectType = 'adsk::fusion::Sketch'
+
+    def __init__(self, design, name, component, reference_plane, created_at=None):
+        super().__init__(design, name, created_at)
+        self._parentComponent = component
+        self._referencePlane = reference_plane
+        self._areDimensionsShown = False
+        self._areConstraintsShown = False
+        self._areProfilesShown = True
+        self._isFullyConstrained = False
+
+    parentComponent = api_property('parentComponent')
+    referencePlane = api_property('referencePlane')
+    areDimensionsShown = api_property('areDimensionsShown', True)
+    areConstraintsShown = api_property('areConstraintsShown', True)
+    areProfilesShown = api_property('areProfilesShown', True)
+    isFullyConstrained = api_property('isFullyConstrained')
+
+
+class ConstructionEntity(LightBulbEntity, HealthMixin):
+
+    def __init__(self, design, name, component, created_at=None, light_bulb=True):
+        super().__init__(design, name, created_at, light_bulb)
+        self._component = component
+        self._parent = component
+
+    component = api_property('component')
+    parent = api_property('parent')
+
+
+class ConstructionPlane(ConstructionEntity):
+    objectType = 'adsk::fusion::ConstructionPlane'
+
+
+class ConstructionAxis(ConstructionEntity):
+    objectType = 'adsk::fusion::ConstructionAxis'
+
+
+class ConstructionPoint(ConstructionEntity):
+    objectType = 'adsk::fusion::ConstructionPoint'
+
+
+class Feature(Entity, HealthMixin):
+    objectType = 'adsk::fusion::Feature'
+
+    def __init__(self, design, name, component, bodies, created_at=None):
+        super().__init__(design, name, created_at)
+        self._parentComponent = component
+        self._bodies = bodies
+        self._linkedFeatures = ObjectCollection()
+
+    parentComponent = api_property('parentComponent')
+
+    @property
+    def bodies(self):
+        STATS.reads += 1
+        return ObjectCollection(self._bodies)
+
+    @property
+    def linkedFeatures(self):
+        STATS.reads += 1
+        return self._linkedFeatures
+
+
+class ExtrudeFeature(Feature):
+    objectType = 'adsk::fusion::ExtrudeFeature'
+
+
+class FilletFeature(Feature):
+    objectType = 'adsk::fusion::FilletFeature'
+
+
+class RectangularPatternFeature(Feature):
+    objectType = 'adsk::fusion::RectangularPatternFeature'
+
+
+class Joint(LightBulbEntity, HealthMixin):
+    objectType = 'adsk::fusion::Joint'
+
+    def __init__(self, design, name, component, occurrence_one, occurrence_two, created_at=None):
+        super().__init__(design, name, created_at)
+        self._parentComponent = component
+        self._occurrenceOne = occurrence_one
+        self._occurrenceTwo = occurrence_two
+
+    parentComponent = api_property('parentComponent')
+    occurrenceOne = api_property('occurrenceOne')
+    occurrenceTwo = api_property('occurrenceTwo')
+
+
+class RigidGroup(LightBulbEntity, HealthMixin):
+    objectType = 'adsk::fusion::RigidGroup'
+
+    def __init__(self, design, name, component, occurrences, created_at=None):
+        super().__init__(design, name, created_at)
+        self._parentComponent = component
+        self._occurrences = occurrences
+
+    parentComponent = api_property('parentComponent')
+
+    @property
+    def occurrences(self):
+        STATS.reads += 1
+        return ObjectCollection([o for o in self._occurrences if o.exists()])
+
+
+class Occurrence(LightBulbEntity):
+    objectType = 'adsk::fusion::Occurrence'
+
+    def __init__(self, design, component, created_at=None):
+        super().__init__(design, component._name + ':1', created_at)
+        self._component = component
+        component._instances.append(self)
+        self._fullPathName = component._name + ':1'
+
+    component = api_property('component')
+    fullPathName = api_property('fullPathName')
+
+    @property
+    def isVisible(self):
+        STATS.reads += 1
+        return self._isLightBulbOn
+
+    @property
+    def bRepBodies(self):
+        return self._component.bRepBodies
+
+    @property
+    def childOccurrences(self):
+        return _filtered(self._component._occurrences)
+
+
+def _filtered(items):
+    STATS.reads += 1
+    return ObjectCollection([item for item in items if item.exists()])
+
+
+class Component(Entity):
+    objectType = 'adsk::fusion::Component'
+
+    def __init__(self, design, name, created_at=None):
+        super().__init__(design, name, created_at)
+        self._isBodiesFolderLightBulbOn = True
+        self._isSketchFolderLightBulbOn = True
+        self._isConstructionFolderLightBulbOn = True
+        self._isOriginFolderLightBulbOn = False
+        self._isJointsFolderLightBulbOn = True
+        self._bodies = []
+        self._sketches = []
+        self._planes = []
+        self._axes = []
+        self._points = []
+        self._joints = []
+        self._occurrences = []
+
+        # Occurrences referencing this component, anywhere in the design
+        self._instances = []
+
+        self._origin = {
+            'xConstructionAxis': ConstructionAxis(design, 'X', self, created_at, False),
+            'yConstructionAxis': ConstructionAxis(design, 'Y', self, created_at, False),
+            'zConstructionAxis': ConstructionAxis(design, 'Z', self, created_at, False),
+            'xYConstructionPlane': ConstructionPlane(design, 'XY', self, created_at, False),
+            'xZConstructionPlane': ConstructionPlane(design, 'XZ', self, created_at, False),
+            'yZConstructionPlane': ConstructionPlane(design, 'YZ', self, created_at, False),
+            'originConstructionPoint': ConstructionPoint(design, 'Origin', self, created_at, False),
+        }
+
+    isBodiesFolderLightBulbOn = api_property('isBodiesFolderLightBulbOn', True)
+    isSketchFolderLightBulbOn = api_property('isSketchFolderLightBulbOn', True)
+    isConstructionFolderLightBulbOn = api_property('isConstructionFolderLightBulbOn', True)
+    isOriginFolderLightBulbOn = api_property('isOriginFolderLightBulbOn', True)
+    isJointsFolderLightBulbOn = api_property('isJointsFolderLightBulbOn', True)
+
+    def __getattr__(self, name):
+        origin = self.__dict__.get('_origin', {})
+        if name in origin:
+            STATS.reads += 1
+            return origin[name]
+        raise AttributeError(name)
+
+    @property
+    def bRepBodies(self):
+        return _filtered(self._bodies)
+
+    @property
+    def sketches(self):
+        return _filtered(self._sketches)
+
+    @property
+    def constructionPlanes(self):
+        return _filtered(self._planes)
+
+    @property
+    def constructionAxes(self):
+        return _filtered(self._axes)
+
+    @property
+    def constructionPoints(self):
+        return _filtered(self._points)
+
+    @property
+    def joints(self):
+        return _filtered(self._joints)
+
+    @property
+    def occurrences(self):
+        return _filtered(self._occurrences)
+
+    @property
+    def allOccurrences(self):
+        STATS.reads += 1
+        return ObjectCollection([o for o in self._design._occurrences if o.exists()])
+
+    @api_method
+    def allOccurrencesByComponent(self, component):
+        return ObjectCollection([o for o in component._instances if o.exists()])
+
+
+class TimelineObject(Base):
+    objectType = 'adsk::fusion::TimelineObject'
+
+    def __init__(self, timeline, index, entity):
+        self._timeline = timeline
+        self._index = index
+        self._entity = entity
+        self._isGroup = False
+        self._isSuppressed = False
+        self._isCollapsed = True
+
+    entity = api_property('entity')
+    index = api_property('index')
+    isGroup = api_property('isGroup')
+    isSuppressed = api_property('isSuppressed')
+    isCollapsed = api_property('isCollapsed', True)
+
+    @property
+    def name(self):
+        STATS.reads += 1
+        return self._entity._name
+
+    @property
+    def healthState(self):
+        STATS.reads += 1
+        return getattr(self._entity, '_healthState', FeatureHealthStates.HealthyFeatureHealthState)
+
+    @property
+    def errorOrWarningMessage(self):
+        STATS.reads += 1
+        return getattr(self._entity, '_errorOrWarningMessage', '')
+
+
+class Timeline(Base):
+    objectType = 'adsk::fusion::Timeline'
+
+    def __init__(self, design):
+        self._design = design
+        self._items = []
+        self._markerPosition = 0
+
+    @property
+    def markerPosition(self):
+        STATS.reads += 1
+        return self._markerPosition
+
+    @markerPosition.setter
+    def markerPosition(self, value):
+        STATS.writes += 1
+        self._markerPosition = max(0, min(value, len(self._items)))
+
+    @property
+    def count(self):
+        STATS.reads += 1
+        return len(self._items)
+
+    @api_method
+    def item(self, index):
+        return self._items[index]
+
+    @api_method
+    def movetoNextStep(self):
+        if self._markerPosition < len(self._items):
+            self._markerPosition += 1
+        return True
+
+    @api_method
+    def movetoPreviousStep(self):
+        if self._markerPosition > 0:
+            self._markerPosition -= 1
+        return True
+
+    @api_method
+    def moveToBeginning(self):
+        self._markerPosition = 0
+        return True
+
+    @api_method
+    def moveToEnd(self):
+        self._markerPosition = len(self._items)
+        return True
+
+    def __iter__(self):
+        STATS.reads += 1
+        return iter(list(self._items))
+
+    def add(self, entity):
+        timeline_object = TimelineObject(self, len(self._items), entity)
+        self._items.append(timeline_object)
+        if hasattr(entity, '_timelineObject') or isinstance(entity, HealthMixin):
+            entity._timelineObject = timeline_object
+        self._markerPosition = len(self._items)
+        return timeline_object
+
+
+class Design(Base):
+    objectType = 'adsk::fusion::Design'
+
+    def __init__(self, name='Untitled'):
+        self._tokens = {}
+        self._temp_id = 0
+        self._occurrences = []
+        self._components = []
+        self.productType = 'DesignProductType'
+        self._designType = DesignTypes.ParametricDesignType
+        self._timeline = Timeline(self)
+        self._rootComponent = Component(self, name)
+        self._components.append(self._rootComponent)
+
+    designType = api_property('designType')
+    rootComponent = api_property('rootComponent')
+
+    @property
+    def timeline(self):
+        STATS.reads += 1
+        return self._timeline
+
+    @property
+    def allComponents(self):
+        STATS.reads += 1
+        return ObjectCollection([c for c in self._components if c.exists()])
+
+    def new_token(self, entity):
+        token = 'token_{}'.format(len(self._tokens))
+        self._tokens[token] = entity
+        return token
+
+    def next_temp_id(self):
+        self._temp_id += 1
+        return self._temp_id
+
+    @api_method
+    def findEntityByToken(self, token):
+        entity = self._tokens.get(token, None)
+        if entity is None or not entity.exists():
+            return []
+        return [entity]
+
+
+class Products:
+
+    def __init__(self, design):
+        self._design = design
+
+    def itemByProductType(self, product_type):
+        if product_type == 'DesignProductType':
+            return self._design
+        return None
+
+
+class DataFile:
+
+    def __init__(self, file_id, version_number):
+        self.id = file_id
+        self.versionNumber = version_number
+
+
+class Document(Base):
+    objectType = 'adsk::core::Document'
+
+    def __init__(self, design, name='Untitled', version=1):
+        self.design = design
+        self.name = name
+        self.products = Products(design)
+        self.dataFile = DataFile('urn:' + name, version)
+
+
+def _placeholder_factory(module, prefix):
+    def placeholder(name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        placeholder_type = type(name, (Base,), {'objectType': prefix + name})
+        setattr(module, name, placeholder_type)
+        return placeholder_type
+    return placeholder
+
+
+def install():
+    """
+    Registers the stand-in as the adsk, adsk.core, adsk.fusion and adsk.cam modules.
+    :return: The adsk package module
+    """
+    adsk = types.ModuleType('adsk')
+    core = types.ModuleType('adsk.core')
+    fusion = types.ModuleType('adsk.fusion')
+    cam = types.ModuleType('adsk.cam')
+
+    this_module = sys.modules[__name__]
+    core_names = ['Base', 'ObjectCollection', 'Application', 'Command', 'CommandInputs', 'CommandInput',
+                  'CommandDefinition', 'UserInterface', 'CommandTerminationReason', 'DropDownStyles',
+                  'PaletteDockingStates', 'EventHandler', 'CommandEventHandler', 'CommandCreatedEventHandler',
+                  'InputChangedEventHandler', 'HTMLEventHandler', 'UserInterfaceGeneralEventHandler',
+                  'DocumentEventHandler', 'WorkspaceEventHandler', 'CustomEventHandler', 'Document',
+                  'BoolValueCommandInput', 'DistanceValueCommandInput', 'FloatSliderCommandInput',
+                  'FloatSpinnerCommandInput', 'IntegerSliderCommandInput', 'IntegerSpinnerCommandInput',
+                  'ValueCommandInput', 'SliderCommandInput', 'StringValueCommandInput', 'ButtonRowCommandInput',
+                  'DropDownCommandInput', 'RadioButtonGroupCommandInput', 'SelectionCommandInput',
+                  'TextBoxCommandInput']
+    fusion_names = ['FeatureHealthStates', 'DesignTypes', 'Design', 'Component', 'Occurrence', 'BRepBody',
+                    'BRepFace', 'Sketch', 'ConstructionPlane', 'ConstructionAxis', 'ConstructionPoint', 'Feature',
+                    'ExtrudeFeature', 'FilletFeature', 'RectangularPatternFeature', 'Joint', 'RigidGroup',
+                    'Timeline', 'TimelineObject']
+
+    for name in core_names:
+        setattr(core, name, getattr(this_module, name))
+    for name in fusion_names:
+        setattr(fusion, name, getattr(this_module, name))
+
+    # Types only used in annotations or casts the player never needs resolve to inert placeholders
+    for module, prefix in ((core, 'adsk::core::'), (fusion, 'adsk::fusion::'), (cam, 'adsk::cam::')):
+        module.__getattr__ = _placeholder_factory(module, prefix)
+
+    adsk.core = core
+    adsk.fusion = fusion
+    adsk.cam = cam
+
+    sys.modules['adsk'] = adsk
+    sys.modules['adsk.core'] = core
+    sys.modules['adsk.fusion'] = fusion
+    sys.modules['adsk.cam'] = cam
+    return adsk
+
+
+def activate(design, name='Untitled', version=1):
+    app = Application.get()
+    app.activeDocument = Document(design, name, version)
+    return app
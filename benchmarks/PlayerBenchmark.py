@@ -0,0 +1,360 @@
+# Headless benchmarks of the player
+#
+# The add-in is loaded against the stand-in adsk modules in AdskStandIn, so it runs without Fusion.  Wall clock times
+# only compare player versions with each other, the stand-in API is far faster than Fusion.  The API call counts
+# are the numbers that carry over to Fusion.
+#
+# Usage, from the add-in folder:
+#     python benchmarks/PlayerBenchmark.py --sizes 10 100 1000 --features 2 --repeat 3
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import types
+
+import AdskStandIn
+from AdskStandIn import STATS
+from SyntheticDesign import build_design
+
+ADDIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_player(addin_dir=ADDIN_DIR, package_name='FusionPlayer'):
+    """
+    Imports PlayerCommand from an add-in folder as part of a package, the way Fusion loads it
+    :param addin_dir: Folder of the add-in
+    :param package_name: Name to give the package, use different names to load two versions side by side
+    :return: The PlayerCommand module
+    """
+    AdskStandIn.install()
+
+    package = types.ModuleType(package_name)
+    package.__path__ = [addin_dir]
+    sys.modules[package_name] = package
+
+    return importlib.import_module(package_name + '.PlayerCommand')
+
+
+class Measurement:
+
+    def __init__(self, size, name, seconds, steps=0):
+        self.size = size
+        self.name = name
+        self.seconds = seconds
+        self.steps = steps
+        self.api = STATS.as_dict()
+
+    def to_result(self):
+        result = {"size": self.size, "benchmark": self.name, "seconds": self.seconds, "steps": self.steps}
+        result.update(self.api)
+        return result
+
+    def line(self):
+        api_total = sum(self.api.values())
+        line = '{:>7} {:<10} {:>10.4f} s {:>8} steps {:>9} reads {:>8} writes {:>8} calls'.format(
+            self.size, self.name, self.seconds, self.steps, self.api['reads'], self.api['writes'], self.api['calls'])
+
+        if self.steps:
+            line += '  {:>10.1f} us/step {:>8.1f} api/step'.format(self.seconds / self.steps * 1e6,
+                                                                    api_total / self.steps)
+        return line
+
+
+def new_design(size, features):
+    design = build_design(size, features)
+    AdskStandIn.activate(design)
+    return design
+
+
+def bench_playback(player, size, features, max_steps=None):
+    """
+    Plays the whole timeline the way Play From Beginning does, including building and ending the session
+    """
+    design = new_design(size, features)
+    STATS.reset()
+    start = time.perf_counter()
+
+    player.start_playback()
+    design.timeline.moveToBeginning()
+
+    steps = 0
+    while (max_steps is None or steps < max_steps) and player.session.step():
+        steps += 1
+
+    player.end_playback()
+
+    return Measurement(size, 'playback', time.perf_counter() - start, steps)
+
+
+def bench_step(player, size, features, count=20):
+    """
+    Plays single steps from the middle of the timeline, the session is already running
+    """
+    design = new_design(size, features)
+    player.start_playback()
+    player.session.seek(design.timeline.count // 2)
+
+    STATS.reset()
+    start = time.perf_counter()
+
+    steps = 0
+    while steps < count and player.session.step():
+        steps += 1
+
+    measurement = Measurement(size, 'step', time.perf_counter() - start, steps)
+    player.end_playback()
+    return measurement
+
+
+def bench_snapshot(player, size, features):
+    """
+    Captures the display state of every entity up front, as the eager capture does
+    """
+    new_design(size, features)
+    STATS.reset()
+    start = time.perf_counter()
+
+    player.build_display_state_object()
+
+    return Measurement(size, 'snapshot', time.perf_counter() - start)
+
+
+def bench_restore(player, size, features, max_steps=None):
+    """
+    Restores the original display state after playing the timeline
+    """
+    design = new_design(size, features)
+    player.start_playback()
+    design.timeline.moveToBeginning()
+
+    steps = 0
+    while (max_steps is None or steps < max_steps) and player.session.step():
+        steps += 1
+
+    STATS.reset()
+    start = time.perf_counter()
+
+    player.end_playback()
+
+    return Measurement(size, 'restore', time.perf_counter() - start, steps)
+
+
+def light_bulbs(design):
+    """
+    :return: Every light bulb and display flag of the entities that exist at the marker, by token and property
+    :rtype: dict
+    """
+    state = {}
+
+    for token, entity in design._tokens.items():
+        if not entity.exists():
+            continue
+
+        for name, value in vars(entity).items():
+            if (name.startswith('_is') and name.endswith('On')) or (name.startswith('_are') and name.endswith('Shown')):
+                state[(token, name[1:])] = value
+
+    return state
+
+
+def play_states(player, size, features, full_sweep, design_options):
+    design = build_design(size, features, **design_options)
+    AdskStandIn.activate(design)
+
+    player.start_playback()
+    design.timeline.moveToBeginning()
+
+    states = []
+
+    while True:
+
+        # Without the differential engine every step isolates by sweeping the whole design
+        if full_sweep:
+            player.session.visibility.is_swept = False
+
+        if not player.session.step():
+            break
+
+        states.append(light_bulbs(design))
+
+    player.end_playback()
+    return states
+
+
+def verify_visibility(player, size, features, **design_options):
+    """
+    Plays the timeline twice, once as the player does and once with a full isolate() sweep on every step, and compares
+    the light bulbs after each step
+    :return: Steps whose light bulbs differ, with the first few differences of each
+    :rtype: list
+    """
+    played = play_states(player, size, features, False, design_options)
+    swept = play_states(player, size, features, True, design_options)
+
+    differences = []
+
+    for index, (state, expected) in enumerate(zip(played, swept)):
+        if state != expected:
+            keys = [key for key in expected if state.get(key, None) != expected[key]]
+            differences.append((index, [(key, state.get(key, None), expected[key]) for key in keys[:4]]))
+
+    if len(played) != len(swept):
+        differences.append((min(len(played), len(swept)), 'played {} steps, swept {}'.format(len(played), len(swept))))
+
+    return differences
+
+
+# Light bulbs the isolated view of a step sets, folder light bulbs a step turns on stay on for the steps after it
+ISOLATED = ('isLightBulbOn', 'isBodiesFolderLightBulbOn')
+
+
+def isolated_light_bulbs(design):
+    return {key: value for key, value in light_bulbs(design).items() if key[1] in ISOLATED}
+
+
+def verify_seeks(player, size, features, **design_options):
+    """
+    Plays the timeline step by step, then jumps around it with Go To Step and Previous, stepping on after some jumps,
+    and compares the light bulbs after every action with the ones the step had when it was played in order
+    :return: Jumps whose light bulbs differ, with the first few differences of each
+    :rtype: list
+    """
+    design = build_design(size, features, **design_options)
+    AdskStandIn.activate(design)
+
+    player.start_playback()
+    design.timeline.moveToBeginning()
+
+    expected = []
+
+    while player.session.step():
+        expected.append(isolated_light_bulbs(design))
+
+    player.end_playback()
+
+    count = len(expected)
+    actions = [count // 2, count // 2 + 3, 'previous', 'previous', 2, count - 1, count // 3, count // 3 + 1, 'previous',
+               0] + ['next'] * 10 + [count // 4, count - 2, count // 5, 'previous'] + ['next'] * 10
+
+    design = build_design(size, features, **design_options)
+    AdskStandIn.activate(design)
+
+    player.start_playback()
+    design.timeline.moveToBeginning()
+
+    differences = []
+
+    for action in actions:
+        if action == 'previous':
+            player.session.previous()
+        elif action == 'next':
+            player.session.step()
+        else:
+            player.session.seek(action)
+
+        index = player.session.result["index"]
+        state = isolated_light_bulbs(design)
+
+        if state != expected[index]:
+            keys = [key for key in expected[index] if state.get(key, None) != expected[index][key]]
+            differences.append(('step', index, [(key, state.get(key, None), expected[index][key]) for key in keys[:4]]))
+
+    player.end_playback()
+    return differences
+
+
+def verify_restore(player, size, features, **design_options):
+    """
+    Plays forward, seeks back and ends playback, then rolls the marker to the end and compares the light bulbs with the
+    ones the design had before playback, so entities rolled back by the seek are checked too
+    :return: Runs with light bulbs that were not restored, with the first few of each
+    :rtype: list
+    """
+    differences = []
+
+    for played, target in ((30, 2), (60, 10), (90, 0), (120, 119)):
+        design = build_design(size, features, **design_options)
+        AdskStandIn.activate(design)
+        before = isolated_light_bulbs(design)
+
+        player.start_playback()
+        design.timeline.moveToBeginning()
+
+        for _ in range(played):
+            player.session.step()
+
+        player.session.seek(target)
+        marker = design.timeline.markerPosition
+
+        player.end_playback()
+
+        if design.timeline.markerPosition != marker:
+            differences.append(('played', played, 'seek', target, 'marker not kept'))
+
+        design.timeline.moveToEnd()
+        after = isolated_light_bulbs(design)
+
+        lost = [key for key in before if after.get(key, None) != before[key]]
+
+        if lost:
+            differences.append(('played', played, 'seek', target, len(lost), lost[:4]))
+
+    return differences
+
+
+def best_of(repeat, benchmark, *args):
+    return min((benchmark(*args) for _ in range(repeat)), key=lambda measurement: measurement.seconds)
+
+
+def run(player, sizes, features=2, repeat=3, max_steps=None):
+    measurements = []
+
+    for size in sizes:
+        for benchmark, args in ((bench_playback, (max_steps,)), (bench_step, ()), (bench_snapshot, ()),
+                                (bench_restore, (max_steps,))):
+            measurement = best_of(repeat, benchmark, player, size, features, *args)
+            measurements.append(measurement)
+            print(measurement.line())
+
+    return measurements
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmark the player against synthetic designs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                        help='Numbers of components to generate')
+    parser.add_argument('--features', type=int, default=2, help='Features in each component')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each benchmark, the fastest is reported')
+    parser.add_argument('--steps', type=int, default=None, help='Stop playback after this many steps')
+    parser.add_argument('--addin', default=ADDIN_DIR, help='Add-in folder to benchmark')
+    parser.add_argument('--json', default=None, help='Also write the results to this file')
+    parser.add_argument('--verify', action='store_true',
+                        help='Only check that every step leaves the light bulbs a full isolate() sweep would, that '
+                             'seeks leave the light bulbs of playing in order and that ending restores every light bulb')
+    options = parser.parse_args(arguments)
+
+    player = load_player(options.addin)
+
+    if options.verify:
+        failed = False
+
+        for size in options.sizes:
+            for name, verify in (('steps', verify_visibility), ('seeks', verify_seeks), ('restore', verify_restore)):
+                differences = verify(player, size, options.features, rigid_every=4, inserted_every=3)
+                print('{:>7} components {:<8} {}'.format(size, name, 'identical' if not differences else differences[:5]))
+                failed = failed or bool(differences)
+
+        return 1 if failed else 0
+
+    measurements = run(player, options.sizes, options.features, options.repeat, options.steps)
+
+    if options.json is not None:
+        with open(options.json, 'w') as results_file:
+            json.dump([measurement.to_result() for measurement in measurements], results_file, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
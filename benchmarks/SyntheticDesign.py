@@ -0,0 +1,105 @@
+# Synthetic designs for the benchmarks
+#
+# Each component gets an occurrence, a sketch on its XY plane, a construction plane and a run of features creating and
+# filleting bodies.  Consecutive occurrences are connected by joints and optionally locked by rigid groups, so every
+# kind of step the player handles is in the timeline.  Inserted components arrive with a single occurrence step that
+# brings a body, a sketch and a construction plane made outside of this timeline.
+
+from AdskStandIn import Design, Component, Occurrence, Sketch, ConstructionPlane, BRepBody, ExtrudeFeature, \
+    FilletFeature, Joint, RigidGroup, FeatureHealthStates
+
+
+def build_design(components=10, features_per_component=2, joints=True, error_every=0, rigid_every=0, inserted_every=0,
+                 name='Synthetic'):
+    """
+    Builds a parametric design with the marker at the end of the timeline.
+    :param components: Number of components, each adds features_per_component + 3 steps plus a joint
+    :param features_per_component: Extrude and fillet features in each component
+    :param joints: Connect consecutive occurrences with joints
+    :param error_every: Put every nth feature in an error state, 0 for none
+    :param rigid_every: Lock every nth occurrence to the previous one with a rigid group, 0 for none
+    :param inserted_every: Insert a component with content after every nth component, 0 for none
+    :param name: Name of the root component
+    :rtype: Design
+    """
+    design = Design(name)
+    timeline = design._timeline
+    root = design._rootComponent
+    previous_occurrence = None
+    feature_count = 0
+
+    for c in range(components):
+        component = Component(design, 'Component{}'.format(c), len(timeline._items))
+        occurrence = Occurrence(design, component, len(timeline._items))
+        design._components.append(component)
+        design._occurrences.append(occurrence)
+        root._occurrences.append(occurrence)
+        timeline.add(occurrence)
+
+        sketch = Sketch(design, 'Sketch{}'.format(c), component, component._origin['xYConstructionPlane'],
+                        len(timeline._items))
+        component._sketches.append(sketch)
+        timeline.add(sketch)
+
+        plane = ConstructionPlane(design, 'Plane{}'.format(c), component, len(timeline._items))
+        component._planes.append(plane)
+        timeline.add(plane)
+
+        bodies = []
+        for f in range(features_per_component):
+            index = len(timeline._items)
+            if f == 0 or f % 3 == 1:
+                body = BRepBody(design, 'Body{}_{}'.format(c, f), component, index)
+                component._bodies.append(body)
+                bodies.append(body)
+                feature = ExtrudeFeature(design, 'Extrude{}'.format(feature_count), component, [body], index)
+            else:
+                feature = FilletFeature(design, 'Fillet{}'.format(feature_count), component, bodies[-1:], index)
+
+            feature_count += 1
+            if error_every and feature_count % error_every == 0:
+                feature._healthState = FeatureHealthStates.ErrorFeatureHealthState
+                feature._errorOrWarningMessage = 'Compute failed'
+            timeline.add(feature)
+
+        if joints and previous_occurrence is not None:
+            joint = Joint(design, 'Joint{}'.format(c), root, previous_occurrence, occurrence, len(timeline._items))
+            root._joints.append(joint)
+            timeline.add(joint)
+
+        if rigid_every and previous_occurrence is not None and c % rigid_every == 0:
+            rigid_group = RigidGroup(design, 'RigidGroup{}'.format(c), root, [previous_occurrence, occurrence],
+                                     len(timeline._items))
+            timeline.add(rigid_group)
+
+        if inserted_every and c % inserted_every == inserted_every - 1:
+            insert_component(design, 'Inserted{}'.format(c))
+
+        previous_occurrence = occurrence
+
+    return design
+
+
+def insert_component(design, name):
+    """
+    Adds an occurrence step placing a component whose content was made outside of the timeline, like an inserted or
+    linked design.  The content exists as soon as the occurrence does.
+    """
+    timeline = design._timeline
+    root = design._rootComponent
+    index = len(timeline._items)
+
+    component = Component(design, name, index)
+    design._components.append(component)
+
+    component._bodies.append(BRepBody(design, name + 'Body', component, index))
+    component._sketches.append(Sketch(design, name + 'Sketch', component, component._origin['xYConstructionPlane'],
+                                      index))
+    component._planes.append(ConstructionPlane(design, name + 'Plane', component, index))
+
+    occurrence = Occurrence(design, component, index)
+    design._occurrences.append(occurrence)
+    root._occurrences.append(occurrence)
+    timeline.add(occurrence)
+
+    return occurrence
@@ -0,0 +1,256 @@
+# Replays an API trace recorded by the player
+#
+# The player is driven through the same actions as the recorded playback, but every object it gets is a ReplayObject
+# answering each property read, write, method call, iteration and cast with the recorded result.  The call pattern
+# is reproduced exactly, with or without the recorded API latency, and no design or Fusion is needed.
+#
+# Usage, from the add-in folder:
+#     python benchmarks/TraceReplay.py PlayerTrace-2020-01-01-00-00-00.jsonl --realtime
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict, deque
+
+from AdskStandIn import STATS
+from PlayerBenchmark import load_player, ADDIN_DIR
+
+# Operations logged in a trace entry, see PlayerTrace
+ROOT = 'o'
+READ = 'r'
+WRITE = 'w'
+CALL = 'c'
+ITERATE = 'i'
+LENGTH = 'n'
+CAST = 'k'
+ACTION = 'a'
+
+ERRORS = {"AttributeError": AttributeError, "ValueError": ValueError, "TypeError": TypeError}
+
+
+class TraceMismatch(Exception):
+    pass
+
+
+class Trace:
+
+    def __init__(self, header, entries):
+        self.header = header
+        self.entries = entries
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as trace_file:
+            header = json.loads(trace_file.readline())
+            entries = [json.loads(line) for line in trace_file if line.strip()]
+
+        return cls(header, entries)
+
+    @property
+    def options(self):
+        return self.header.get("options", {})
+
+    def actions(self):
+        return [(entry[2], entry[3]) for entry in self.entries if entry[1] == ACTION]
+
+    def summary(self):
+        """
+        Count and recorded time of every operation, by operation and name
+        :return: Rows of operation, name, count and microseconds, most time first
+        """
+        totals = defaultdict(lambda: [0, 0])
+
+        for entry in self.entries:
+            if entry[1] in (ROOT, ACTION):
+                continue
+
+            total = totals[(entry[1], entry[2])]
+            total[0] += 1
+            total[1] += entry[5]
+
+        rows = [(operation, name, count, microseconds) for (operation, name), (count, microseconds) in totals.items()]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+
+
+class TraceReplayer:
+
+    def __init__(self, trace, realtime=False):
+        self.trace = trace
+        self.realtime = realtime
+
+        # Recorded results of every object, operation and name, in the order they were handed out
+        self.responses = defaultdict(deque)
+        self.roots = deque()
+        self.methods = set()
+
+        for object_id, operation, name, args, result, microseconds in trace.entries:
+            if operation == ACTION:
+                continue
+
+            if operation == ROOT:
+                self.roots.append(object_id)
+                continue
+
+            if operation == CALL:
+                self.methods.add((object_id, name))
+
+            self.responses[(object_id, operation, name)].append((result, microseconds))
+
+        self.objects = {}
+        self.replayed_microseconds = 0
+
+    def root(self):
+        if not self.roots:
+            raise TraceMismatch('The player asked for more app objects than were recorded')
+
+        return self.object(self.roots.popleft())
+
+    def object(self, object_id):
+        replay_object = self.objects.get(object_id, None)
+
+        if replay_object is None:
+            replay_object = self.objects[object_id] = ReplayObject(self, object_id)
+
+        return replay_object
+
+    def respond(self, object_id, operation, name):
+        queue = self.responses.get((object_id, operation, name), None)
+
+        if not queue:
+            raise TraceMismatch('No recorded result for {} {} on object {}'.format(operation, name, object_id))
+
+        result, microseconds = queue.popleft()
+
+        if operation in (READ, ITERATE, LENGTH):
+            STATS.reads += 1
+        elif operation == WRITE:
+            STATS.writes += 1
+        else:
+            STATS.calls += 1
+
+        self.replayed_microseconds += microseconds
+
+        if self.realtime and microseconds:
+            end = time.perf_counter() + microseconds / 1e6
+            while time.perf_counter() < end:
+                pass
+
+        if isinstance(result, dict) and "e" in result:
+            raise ERRORS.get(result.get("x", ""), RuntimeError)(result["e"])
+
+        return self.decode(result)
+
+    def decode(self, value):
+        if isinstance(value, dict):
+            if "o" in value:
+                return self.object(value["o"])
+            return [self.decode(item) for item in value["l"]]
+
+        return value
+
+    def remaining(self):
+        return sum(len(queue) for queue in self.responses.values())
+
+
+class ReplayObject:
+    __slots__ = ('_replayer', '_id')
+
+    def __init__(self, replayer, object_id):
+        object.__setattr__(self, '_replayer', replayer)
+        object.__setattr__(self, '_id', object_id)
+
+    def __getattr__(self, name):
+        replayer = self._replayer
+        object_id = self._id
+
+        if (object_id, name) in replayer.methods:
+            return lambda *args: replayer.respond(object_id, CALL, name)
+
+        return replayer.respond(object_id, READ, name)
+
+    def __setattr__(self, name, value):
+        self._replayer.respond(self._id, WRITE, name)
+
+    def __iter__(self):
+        return iter(self._replayer.respond(self._id, ITERATE, ''))
+
+    def __len__(self):
+        return self._replayer.respond(self._id, LENGTH, '')
+
+    def __bool__(self):
+        return True
+
+    # Called by the stand-in casts
+    def replay_cast(self, object_type):
+        return self._replayer.respond(self._id, CAST, object_type)
+
+
+def replay(trace, player, realtime=False):
+    """
+    Drives the player through the recorded actions against the recorded results
+    :param trace: The loaded Trace
+    :param player: The PlayerCommand module, see PlayerBenchmark.load_player
+    :param realtime: Wait for the recorded duration of every API call
+    :return: The replayer, with the results that were not asked for left in it
+    :rtype: TraceReplayer
+    """
+    replayer = TraceReplayer(trace, realtime)
+    player.AppObjects = replayer.root
+
+    player.start_playback(trace.options.get("lazy_capture", True))
+
+    for name, args in trace.actions():
+        if name == 'step':
+            player.session.step()
+        elif name == 'seek':
+            player.session.seek(*args)
+        elif name == 'previous':
+            player.session.previous()
+        elif name == 'seek_match':
+            player.session.seek_match(*args)
+        elif name == 'filter':
+            player.session.set_filter(*args)
+        elif name == 'end':
+            player.end_playback()
+
+    # A recording cut short never ended its playback, its session is dropped without restoring
+    player.session = None
+
+    return replayer
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Replay an API trace recorded by the player')
+    parser.add_argument('trace', help='Trace file written by the player')
+    parser.add_argument('--realtime', action='store_true', help='Wait for the recorded duration of every API call')
+    parser.add_argument('--addin', default=ADDIN_DIR, help='Add-in folder to replay against')
+    parser.add_argument('--top', type=int, default=15, help='Operations to list by recorded time')
+    options = parser.parse_args(arguments)
+
+    trace = Trace.load(options.trace)
+    player = load_player(options.addin)
+
+    STATS.reset()
+    start = time.perf_counter()
+
+    replayer = replay(trace, player, options.realtime)
+
+    seconds = time.perf_counter() - start
+
+    print('{} entries, {} actions, {} objects'.format(len(trace.entries), len(trace.actions()),
+                                                       trace.header.get("objects", 0)))
+    print('replayed in {:.4f} s, recorded API time {:.4f} s'.format(seconds, replayer.replayed_microseconds / 1e6))
+    print('{} reads, {} writes, {} calls, {} recorded results not asked for'.format(
+        STATS.reads, STATS.writes, STATS.calls, replayer.remaining()))
+
+    print('\nSlowest operations:')
+    for operation, name, count, microseconds in trace.summary()[:options.top]:
+        print('{:>3} {:<32} {:>9} x {:>12.6f} s'.format(operation, name, count, microseconds / 1e6))
+
+    return 0 if replayer.remaining() == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())